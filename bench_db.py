@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark SQLite read throughput while notebooks are being written: the
+default rollback journal versus the tuned WAL configuration in db_config
+
+    python bench_db.py                          # 4 readers, 2 writers, 5 s per variant
+    python bench_db.py --readers 8 --writers 4 --seconds 10
+
+Each variant runs against a fresh database in a temporary directory, seeded
+with ``--seed`` public notebooks. Readers list the newest public notebooks and
+fetch one by id; writers insert notebooks (including their search index rows)
+and bump view counts, each in its own transaction.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix='bench_db_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import app, db, public_notebooks, Notebook, User
+from db_config import SQLITE_PRAGMAS
+
+# SQLite's own defaults, i.e. the configuration before db_config
+ROLLBACK_JOURNAL = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def reset(pragmas, seed):
+    db.engine.dispose()
+    for name in os.listdir(WORK_DIR):
+        os.remove(os.path.join(WORK_DIR, name))
+    app.config['SQLITE_PRAGMAS'] = pragmas
+    db.create_all()
+    user = User(username='bench', email='bench@example.com', password_hash='-')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all(new_notebook(user.id, i) for i in range(seed))
+    db.session.commit()
+    return user.id
+
+
+def new_notebook(user_id, i):
+    return Notebook(
+        title=f'Benchmark notebook {i}', description='Token price analysis', filename='bench.ipynb',
+        file_path='uploads/blobs/bench.ipynb', tags='bench', is_public=True, user_id=user_id
+    )
+
+
+def reader(stop, seed, latencies, errors):
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                public_notebooks().order_by(Notebook.created_at.desc()).limit(20).all()
+                db.session.get(Notebook, random.randint(1, seed))
+            except OperationalError:
+                errors.append(1)
+            finally:
+                db.session.remove()
+            latencies.append(time.perf_counter() - start)
+
+
+def writer(stop, user_id, seed, writes, errors):
+    with app.app_context():
+        i = 0
+        while not stop.is_set():
+            try:
+                db.session.add(new_notebook(user_id, i))
+                db.session.execute(
+                    text('UPDATE notebook SET views = views + 1 WHERE id = :id'), {'id': random.randint(1, seed)}
+                )
+                db.session.commit()
+                writes.append(1)
+            except OperationalError:
+                db.session.rollback()
+                errors.append(1)
+            i += 1
+        db.session.remove()
+
+
+def run(label, pragmas, args):
+    with app.app_context():
+        user_id = reset(pragmas, args.seed)
+    stop = threading.Event()
+    latencies, writes, read_errors, write_errors = [], [], [], []
+    threads = [threading.Thread(target=reader, args=(stop, args.seed, latencies, read_errors))
+               for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(stop, user_id, args.seed, writes, write_errors))
+                for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    print(f"   {label:<26} {len(latencies) / args.seconds:>9,.0f} reads/s  {len(writes) / args.seconds:>7,.0f} writes/s"
+          f"   read p50 {statistics.median(latencies or [0]) * 1000:6.2f} ms  p99 {p99 * 1000:7.2f} ms"
+          f"   locked errors {len(read_errors) + len(write_errors)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--readers', type=int, default=4, help='concurrent reader threads')
+    parser.add_argument('--writers', type=int, default=2, help='concurrent writer threads')
+    parser.add_argument('--seconds', type=float, default=5.0, help='duration of each variant')
+    parser.add_argument('--seed', type=int, default=1000, help='notebooks created before the run')
+    args = parser.parse_args()
+
+    print(f"🗄️  {args.readers} readers, {args.writers} writers, {args.seconds:g} s per variant")
+    try:
+        run('rollback journal (before)', ROLLBACK_JOURNAL, args)
+        run('WAL + tuned pragmas', dict(SQLITE_PRAGMAS), args)
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark password verification: logins/sec per core for each hashing
+method, and throughput through the bounded hashing pool
+
+    python bench_passwords.py                              # default methods, 2 s each
+    python bench_passwords.py --methods scrypt:16384:8:1 --workers 4
+
+"Per core" is one verification at a time on one thread. The pool rows run
+``--clients`` concurrent logins through a PasswordHasher with ``--workers``
+threads, which caps the cores used however many clients there are.
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from passwords import PasswordHasher
+
+METHODS = ['pbkdf2:sha256:260000', 'pbkdf2:sha256:600000', 'scrypt:32768:8:1']
+PASSWORD = 'correct horse battery staple'
+
+
+def per_core(pwhash, seconds):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        check_password_hash(pwhash, PASSWORD)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def pooled(method, pwhash, workers, clients, seconds):
+    hasher = PasswordHasher(method, workers=workers, max_pending=clients)
+    stop = threading.Event()
+    counts = [0] * clients
+
+    def client(i):
+        while not stop.is_set():
+            hasher.verify(pwhash, PASSWORD)
+            counts[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--methods', nargs='+', default=METHODS, help='Werkzeug hash methods to compare')
+    parser.add_argument('--workers', type=int, default=2, help='hashing pool size')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent logins against the pool')
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of each measurement')
+    args = parser.parse_args()
+
+    print(f"🔐 {os.cpu_count()} cores, pool of {args.workers} workers, {args.clients} concurrent logins")
+    for method in args.methods:
+        pwhash = generate_password_hash(PASSWORD, method)
+        single = per_core(pwhash, args.seconds)
+        pool = pooled(method, pwhash, args.workers, args.clients, args.seconds)
+        print(f"   {method:<24} {1000 / single:8.1f} ms/login   {single:8.1f} logins/s per core"
+              f"   {pool:8.1f} logins/s through the pool")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Vercel dashboard page: per-request template compilation versus
+the precompiled, memoized page
+
+    python bench_vercel.py              # 20 cold starts and 2000 warm requests each
+    python bench_vercel.py --runs 5 --requests 500
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Each cold start runs in a fresh interpreter: import the app, serve one request
+COLD_START = '''
+import time
+start = time.perf_counter()
+import vercel_app
+client = vercel_app.app.test_client()
+{setup}
+response = client.get('/')
+assert response.status_code == 200
+print(time.perf_counter() - start)
+'''
+
+# Restores the old behaviour of compiling the template string on every request
+PER_REQUEST_COMPILE = '''
+from flask import render_template_string
+vercel_app.app.view_functions['index'] = lambda: render_template_string(
+    vercel_app.DASHBOARD_HTML, notebooks=vercel_app.MOCK_NOTEBOOKS
+)
+'''
+
+
+def cold_start(setup, runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', COLD_START.format(setup=setup)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def warm(setup, requests):
+    import vercel_app
+    original = vercel_app.app.view_functions['index']
+    exec(setup, {'vercel_app': vercel_app})
+    client = vercel_app.app.test_client()
+    client.get('/')
+    timings = []
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get('/')
+            timings.append(time.perf_counter() - start)
+    finally:
+        vercel_app.app.view_functions['index'] = original
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"   {label:<28} p50 {statistics.median(timings) * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=20, help='cold starts per variant')
+    parser.add_argument('--requests', type=int, default=2000, help='warm requests per variant')
+    args = parser.parse_args()
+
+    variants = [('per-request compile (before)', PER_REQUEST_COMPILE), ('precompiled + memoized', '')]
+    print(f"🧊 Cold start: import + first request ({args.runs} runs)")
+    for label, setup in variants:
+        report(label, cold_start(setup, args.runs))
+    print(f"🔥 Warm requests ({args.requests} requests)")
+    for label, setup in variants:
+        report(label, warm(setup, args.requests))
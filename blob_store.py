@@ -0,0 +1,97 @@
+"""
+Content-addressed storage for uploaded notebook files
+
+Files are stored once under their SHA-256 (``<root>/ab/abcdef....ipynb``) no
+matter how many notebooks reference them. ``Notebook.file_path`` is the
+reference: a blob is live while at least one row points at it, and
+``collect_garbage`` removes the rest.
+"""
+
+import os
+import time
+import uuid
+
+from notebook_stream import cell_index_path, save_stream
+
+
+class BlobStore:
+    def __init__(self, root, suffix='.ipynb'):
+        self.root = root
+        self.suffix = suffix
+        self.tmp_dir = os.path.join(root, 'tmp')
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest + self.suffix)
+
+    def save(self, stream):
+        """Store ``stream``; return ``(path, digest, deduplicated)``.
+
+        The upload is written to a temporary file while being hashed, then
+        either moved into place or dropped if the same content already exists.
+        """
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(self.tmp_dir, f'{uuid.uuid4()}.part')
+        try:
+            digest, _ = save_stream(stream, tmp_path)
+            return self.ingest(tmp_path, digest)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def ingest(self, tmp_path, digest):
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            # Refresh the mtime so garbage collection treats it as recently used
+            os.utime(path)
+            return path, digest, True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return path, digest, False
+
+    def iter_blobs(self):
+        if not os.path.isdir(self.root):
+            return
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if prefix == 'tmp' or not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(self.suffix):
+                    yield os.path.join(directory, name)
+
+    def collect_garbage(self, referenced_paths, grace_seconds=3600, dry_run=False):
+        """Delete blobs no notebook references and stale temporary files.
+
+        Returns ``(removed paths, bytes freed)``.
+
+        Blobs touched within ``grace_seconds`` are kept so an upload that has
+        stored its file but not yet committed its row is never collected.
+        """
+        referenced = {os.path.normpath(path) for path in referenced_paths}
+        cutoff = time.time() - grace_seconds
+        removed = []
+        freed = 0
+        for path in list(self.iter_blobs()) + self._tmp_files():
+            if os.path.normpath(path) in referenced:
+                continue
+            stat = os.stat(path)
+            if stat.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                os.remove(path)
+            removed.append(path)
+            freed += stat.st_size
+            # The blob's cell index goes with it
+            index_path = cell_index_path(path)
+            if os.path.exists(index_path):
+                freed += os.path.getsize(index_path)
+                if not dry_run:
+                    os.remove(index_path)
+        return removed, freed
+
+    def _tmp_files(self):
+        # Leftovers from uploads that died mid-transfer
+        if not os.path.isdir(self.tmp_dir):
+            return []
+        return [os.path.join(self.tmp_dir, name) for name in os.listdir(self.tmp_dir)]
@@ -0,0 +1,130 @@
+"""
+Database engine configuration
+
+The database is chosen with ``SQLALCHEMY_DATABASE_URI`` (``DATABASE_URL`` in
+the environment). SQLite connections are tuned when they are opened: WAL
+journaling so readers and the writer no longer block each other,
+``synchronous=NORMAL``, a busy timeout instead of immediate "database is
+locked" errors, and memory-mapped reads. Server databases such as PostgreSQL
+get a sized connection pool from ``DATABASE_POOL_*`` environment variables.
+
+With ``DATABASE_REPLICA_URL`` set, views decorated with ``replica_reads``
+send their SELECTs to the replica. A client that has just written (an
+upload, a registration) reads from the primary for
+``REPLICA_STICKY_SECONDS`` so it sees its own changes despite replica lag.
+"""
+
+import os
+import sqlite3
+import time
+from functools import wraps
+
+from flask import current_app, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, UpdateBase, event
+from sqlalchemy.engine import Engine, make_url
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 256 * 1024 * 1024,
+}
+REPLICA_BIND = 'replica'
+PRIMARY_UNTIL_KEY = '_primary_until'  # in the client's session
+
+
+def database_url(default, variable='DATABASE_URL'):
+    """``variable`` from the environment, or ``default``."""
+    url = os.environ.get(variable, default)
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    if url and url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def init_database(app):
+    """Set ``SQLALCHEMY_ENGINE_OPTIONS``, the replica bind and the SQLite connection pragmas.
+
+    Call before ``SQLAlchemy(app)``. ``SQLITE_PRAGMAS`` is applied to every
+    new SQLite connection; the pool settings only apply to server databases.
+    A ``DATABASE_REPLICA_URI`` is registered as the ``replica`` bind.
+    """
+    app.config.setdefault('DATABASE_REPLICA_URI', database_url(None, 'DATABASE_REPLICA_URL'))
+    app.config.setdefault('REPLICA_STICKY_SECONDS', int(os.environ.get('REPLICA_STICKY_SECONDS', 10)))
+    if app.config['DATABASE_REPLICA_URI']:
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = app.config['DATABASE_REPLICA_URI']
+    app.config.setdefault('SQLITE_PRAGMAS', dict(SQLITE_PRAGMAS))
+    app.config.setdefault('DATABASE_POOL_SIZE', int(os.environ.get('DATABASE_POOL_SIZE', 10)))
+    app.config.setdefault('DATABASE_MAX_OVERFLOW', int(os.environ.get('DATABASE_MAX_OVERFLOW', 20)))
+    app.config.setdefault('DATABASE_POOL_TIMEOUT', int(os.environ.get('DATABASE_POOL_TIMEOUT', 30)))
+    app.config.setdefault('DATABASE_POOL_RECYCLE', int(os.environ.get('DATABASE_POOL_RECYCLE', 1800)))
+
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', app.config['DATABASE_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['DATABASE_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', app.config['DATABASE_POOL_TIMEOUT'])
+        # Server-side idle timeouts close connections the pool still holds
+        options.setdefault('pool_recycle', app.config['DATABASE_POOL_RECYCLE'])
+        options.setdefault('pool_pre_ping', True)
+
+    @event.listens_for(Engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in app.config['SQLITE_PRAGMAS'].items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the replica while ``info['use_replica']`` is set.
+
+    Flushes, other statements and every query issued while the session holds
+    pending changes go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if isinstance(clause, UpdateBase):
+            self.info['wrote'] = True
+        elif (bind is None and self.info.get('use_replica') and isinstance(clause, Select)
+                and not self._flushing and not (self.new or self.dirty or self.deleted)):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_write(db_session, flush_context):
+    db_session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _read_own_writes(db_session):
+    if not db_session.info.pop('wrote', False):
+        return
+    # The rest of this request reads its own writes too
+    db_session.info.pop('use_replica', None)
+    if not has_request_context():
+        return
+    if REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        session[PRIMARY_UNTIL_KEY] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(db_session):
+    db_session.info.pop('wrote', None)
+
+
+def replica_reads(view):
+    """Run ``view``'s SELECTs on the replica, unless the client wrote recently."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if (REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {})
+                and session.get(PRIMARY_UNTIL_KEY, 0) <= time.time()):
+            current_app.extensions['sqlalchemy'].session.info['use_replica'] = True
+        return view(*args, **kwargs)
+    return wrapper
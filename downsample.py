@@ -0,0 +1,78 @@
+"""
+Downsampling of chart time series to roughly one point per pixel
+
+Both functions return the indices of the points to keep, in order, so the
+same selection can be applied to every column of a series.
+"""
+
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: keep ``threshold`` points that preserve the shape.
+
+    The first and last points are always kept. Each bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket i covers points edges[i]:edges[i + 1]; the first and last points
+    # are buckets of their own
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(int) + 1
+    edges[-1] = n - 1
+
+    # Averages of every bucket from prefix sums, plus the last point as the
+    # "next bucket" of the final one
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = edges[1:] - edges[:-1]
+    avg_x = np.append((sum_x[edges[1:]] - sum_x[edges[:-1]]) / counts, x[-1])
+    avg_y = np.append((sum_y[edges[1:]] - sum_y[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def min_max(y, buckets):
+    """Keep the minimum and maximum of each of ``buckets`` equal-count buckets.
+
+    Fully vectorized; preserves spikes that LTTB may smooth over.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if buckets < 1 or 2 * buckets >= n:
+        return np.arange(n)
+    bucket = np.arange(n) * buckets // n
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1))
+    counts = np.diff(np.append(starts, n))
+    keep = [[0, n - 1]]
+    for extreme in (np.minimum, np.maximum):
+        # First point in each bucket equal to the bucket's extreme
+        hits = np.flatnonzero(y == np.repeat(extreme.reduceat(y, starts), counts))
+        _, first = np.unique(bucket[hits], return_index=True)
+        keep.append(hits[first])
+    return np.unique(np.concatenate(keep))
+
+
+def for_width(x, y, width, method='lttb'):
+    """Indices to plot ``(x, y)`` on a chart ``width`` pixels wide."""
+    if method == 'minmax':
+        # Two points per bucket, so about one per pixel
+        return min_max(y, width // 2)
+    return lttb(x, y, width)
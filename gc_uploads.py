@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Remove uploaded notebook files, image assets and stored full outputs that no
+notebook references any more
+
+    python gc_uploads.py            # delete orphaned blobs
+    python gc_uploads.py --dry-run  # only list them
+"""
+
+import json
+import sys
+
+from app import app, db, asset_store, blob_store, output_store, read_notebook_cells, Notebook
+from notebook_render import full_output_digests
+from notebook_stream import scan_notebook
+
+
+def referenced_assets(paths):
+    """Return ``(image digests, full output digests, unreadable paths)`` referenced by ``paths``.
+
+    A notebook that cannot be read is reported in ``unreadable`` instead of
+    stopping the scan; the digests it references are unknown.
+    """
+    images = set()
+    outputs = set()
+    unreadable = []
+
+    def collect(cell):
+        images.update(asset_store.digests_in_cell(cell))
+        outputs.update(full_output_digests(cell))
+
+    for path in paths:
+        try:
+            result = scan_notebook(path, on_cell=lambda index, raw_cell: collect(json.loads(raw_cell)))
+            if (result['nbformat'] or 0) < 4:
+                # nbformat 3 keeps its cells under worksheets, which the scan skips
+                for cell in read_notebook_cells(path):
+                    collect(cell)
+        except (OSError, ValueError, ImportError) as e:  # NotebookFormatError, or a cell that is not JSON
+            unreadable.append((path, e))
+    return images, outputs, unreadable
+
+
+def report(removed, freed, kind, dry_run):
+    for path in removed:
+        print(f"   {'would remove' if dry_run else 'removed'} {path}")
+    print(f"🧹 {len(removed)} orphaned {kind}, {freed / (1024 * 1024):.1f} MB {'reclaimable' if dry_run else 'freed'}")
+
+
+def main(dry_run=False):
+    referenced = [path for (path,) in db.session.query(Notebook.file_path).distinct()]
+    print(f"🔗 {len(referenced)} blobs referenced by notebooks")
+    report(*blob_store.collect_garbage(referenced, dry_run=dry_run), 'files', dry_run)
+    print("🖼️  Scanning notebooks for referenced image assets and outputs...")
+    images, outputs, unreadable = referenced_assets(referenced)
+    if unreadable:
+        # Their assets cannot be told apart from orphans, so keep them all
+        for path, error in unreadable:
+            print(f"⚠️  Could not read {path}: {error}")
+        print(f"⏭️  Skipped asset and output collection: {len(unreadable)} notebooks could not be read")
+        return
+    report(*asset_store.collect_garbage(images, dry_run=dry_run), 'assets', dry_run)
+    report(*output_store.collect_garbage(outputs, dry_run=dry_run), 'outputs', dry_run)
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        main(dry_run='--dry-run' in sys.argv[1:])
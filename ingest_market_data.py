@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Bulk-load token market data dumps into the dashboard's market data store
+
+    python ingest_market_data.py dumps/*.csv                 # <SYMBOL>.csv per token
+    python ingest_market_data.py prices.jsonl.gz --db data.db
+    python ingest_market_data.py btc.json --symbol BTC
+
+Files are CSV, JSON arrays or JSON Lines (optionally gzipped) with
+``timestamp, price, market_cap, volume`` and, for multi-token dumps,
+``symbol`` columns. Rows stream through a generator pipeline (read ->
+validate -> deduplicate -> batch) into batched inserts, so memory stays flat
+however large the input is.
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from itertools import chain
+
+from market_data import (
+    DEFAULT_PATH, INGEST_BATCH_ROWS, INGEST_TRANSACTION_ROWS, MarketDataStore,
+    deduplicated_batches, read_rows, validate
+)
+
+
+def ingest(store, paths, symbol=None, batch_size=INGEST_BATCH_ROWS, transaction_rows=INGEST_TRANSACTION_ROWS):
+    stats = Counter()
+    started = time.perf_counter()
+
+    def progress(rows):
+        elapsed = time.perf_counter() - started
+        print(f"   {rows:>12,} rows  {rows / elapsed:>12,.0f} rows/s")
+
+    rows = chain.from_iterable(read_rows(path, symbol) for path in paths)
+    batches = deduplicated_batches(validate(rows, stats), batch_size, stats)
+    stats['written'] = store.ingest(batches, transaction_rows=transaction_rows, progress=progress)
+    return stats, time.perf_counter() - started
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('paths', nargs='+', help='CSV, JSON or JSON Lines files (.gz allowed)')
+    parser.add_argument('--db', default=DEFAULT_PATH, help=f'market data store (default: {DEFAULT_PATH})')
+    parser.add_argument('--symbol', help='token for rows without a symbol (default: the file name)')
+    parser.add_argument('--batch-size', type=int, default=INGEST_BATCH_ROWS, help='rows per executemany')
+    parser.add_argument('--transaction-rows', type=int, default=INGEST_TRANSACTION_ROWS,
+                        help='rows per committed transaction')
+    args = parser.parse_args()
+
+    print(f"📥 Ingesting {len(args.paths)} file(s) into {args.db}...")
+    try:
+        stats, elapsed = ingest(
+            MarketDataStore(args.db, fixtures_dir=None), args.paths,
+            symbol=args.symbol, batch_size=args.batch_size, transaction_rows=args.transaction_rows
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    read = stats['valid'] + stats['rejected']
+    print(f"✅ Wrote {stats['written']:,} rows in {elapsed:.2f} s ({stats['written'] / elapsed:,.0f} rows/s)")
+    print(f"   {read:,} read, {stats['rejected']:,} rejected, {stats['duplicates']:,} duplicates dropped")
@@ -3,11 +3,23 @@
 Initialize the database for the Notebook Dashboard
 """
 
-from app import app, db
+import nbformat
+
+import search_index
+from app import app, db, Notebook
+
+
+def read_search_text(notebook):
+    return search_index.extract_text(nbformat.read(notebook.file_path, as_version=4))
+
 
 with app.app_context():
     print("🗄️  Creating database tables...")
     db.create_all()
+    if search_index.is_supported(db):
+        print("🔎 Rebuilding full-text search index...")
+        indexed = search_index.rebuild(db, Notebook, read_text=read_search_text)
+        print(f"   Indexed {indexed} notebooks")
     print("✅ Database initialized successfully!")
     print("📁 Database file: notebooks.db")
     print("🚀 You can now run: python run.py")
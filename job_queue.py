@@ -0,0 +1,181 @@
+"""
+Background jobs stored in the database
+
+``JobQueue.enqueue`` adds a row to the ``job`` table in the caller's
+transaction, so a job exists exactly when the change that needs it is
+committed. Workers (``python worker.py``) claim due jobs one at a time with a
+conditional UPDATE, run the registered handler and commit its changes
+together with the job's new status. Failed jobs are retried with exponential
+backoff up to ``max_attempts`` times; a job whose worker died mid-run is
+claimed again once its ``lease_seconds`` lease has expired, or failed if that
+was its last attempt.
+"""
+
+import json
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobQueue:
+    def __init__(self, db, model, lease_seconds=300, max_attempts=3, retry_delay=10):
+        self.db = db
+        self.model = model
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.handlers = {}
+
+    def task(self, name, on_failure=None):
+        """Register the decorated function as the handler of ``name`` jobs.
+
+        Handlers get the job's payload as keyword arguments and must not
+        commit. ``on_failure`` is called the same way once a job has failed
+        for the last time.
+        """
+        def decorator(handler):
+            self.handlers[name] = (handler, on_failure)
+            return handler
+        return decorator
+
+    def enqueue(self, name, **payload):
+        """Add a ``name`` job to the current session; it is queued when the session commits."""
+        job = self.model(
+            name=name, payload=json.dumps(payload), status=QUEUED, attempts=0,
+            max_attempts=self.max_attempts, run_at=datetime.utcnow()
+        )
+        self.db.session.add(job)
+        return job
+
+    def claim(self, worker):
+        """Lease the next due job to ``worker``; return it, or ``None`` if no job is due."""
+        Job = self.model
+        session = self.db.session
+        self.fail_abandoned(worker)
+        while True:
+            now = datetime.utcnow()
+            due = or_(
+                and_(Job.status == QUEUED, Job.run_at <= now),
+                and_(self._lease_expired(now), Job.attempts < Job.max_attempts)
+            )
+            job_id = self._lease(worker, due, now, attempts=Job.attempts + 1)
+            if job_id is None:
+                return None
+            if job_id:
+                return session.get(Job, job_id)
+
+    def fail_abandoned(self, worker):
+        """Fail the jobs whose worker died during their last attempt; return how many."""
+        Job = self.model
+        count = 0
+        while True:
+            now = datetime.utcnow()
+            abandoned = and_(self._lease_expired(now), Job.attempts >= Job.max_attempts)
+            job_id = self._lease(worker, abandoned, now)
+            if job_id is None:
+                return count
+            if job_id:
+                job = self.db.session.get(Job, job_id)
+                self._fail(job, f'Lease expired on attempt {job.attempts}; the worker stopped mid-run')
+                count += 1
+
+    def _lease_expired(self, now):
+        Job = self.model
+        return and_(Job.status == RUNNING, Job.locked_at <= now - timedelta(seconds=self.lease_seconds))
+
+    def _lease(self, worker, condition, now, **values):
+        """Lease the first job matching ``condition`` to ``worker``.
+
+        Returns its id, ``0`` if another worker got it first, or ``None`` if
+        no job matches.
+        """
+        Job = self.model
+        session = self.db.session
+        job_id = session.scalar(select(Job.id).where(condition).order_by(Job.run_at, Job.id).limit(1))
+        if job_id is None:
+            session.rollback()
+            return None
+        # Re-checking ``condition`` makes the claim atomic: another worker
+        # that picked the same job updates no row
+        claimed = session.execute(
+            update(Job).where(Job.id == job_id, condition)
+            .values(status=RUNNING, locked_by=worker, locked_at=now, **values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+        return job_id if claimed else 0
+
+    def run_next(self, worker):
+        """Claim and run one job; return ``False`` if no job was due."""
+        job = self.claim(worker)
+        if job is None:
+            return False
+        session = self.db.session
+        handler = self.handlers.get(job.name, (None, None))[0]
+        try:
+            if handler is None:
+                raise LookupError(f'No handler for {job.name} jobs')
+            handler(**json.loads(job.payload))
+            job.status = DONE
+            job.finished_at = datetime.utcnow()
+            job.last_error = None
+            session.commit()
+        except Exception:
+            session.rollback()
+            error = traceback.format_exc()
+            if job.attempts >= job.max_attempts:
+                self._fail(job, error)
+            else:
+                job.status = QUEUED
+                job.last_error = error[-4000:]
+                job.run_at = datetime.utcnow() + timedelta(seconds=self.retry_delay * 2 ** (job.attempts - 1))
+                session.commit()
+        finally:
+            session.remove()
+        return True
+
+    def _fail(self, job, error):
+        """Mark a leased job as failed for good, after calling its ``on_failure``."""
+        session = self.db.session
+        on_failure = self.handlers.get(job.name, (None, None))[1]
+        if on_failure is not None:
+            try:
+                on_failure(**json.loads(job.payload))
+            except Exception:
+                # The job is failed either way; keep both errors
+                session.rollback()
+                error = f'{error}\non_failure raised:\n{traceback.format_exc()}'
+        job.status = FAILED
+        job.finished_at = datetime.utcnow()
+        job.last_error = error[-4000:]
+        session.commit()
+
+    def work(self, worker, stop=None, poll_interval=1.0, burst=False):
+        """Run jobs until ``stop`` (a ``threading.Event``) is set; return how many ran.
+
+        With ``burst`` it returns as soon as no job is due.
+        """
+        count = 0
+        while stop is None or not stop.is_set():
+            if self.run_next(worker):
+                count += 1
+            elif burst:
+                break
+            elif stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+        return count
+
+    def stats(self):
+        counts = dict(
+            self.db.session.query(self.model.status, func.count(self.model.id)).group_by(self.model.status)
+        )
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Generate the offline market-data fixtures in data/market/
+
+Hourly price, market cap and traded volume for the dashboard tokens, from a
+seeded random walk so the files are reproducible. Not real market data.
+
+    python make_market_fixtures.py
+"""
+
+import csv
+import math
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'market')
+END = datetime(2025, 9, 30, 23, tzinfo=timezone.utc)
+HOURS = 90 * 24
+
+# symbol: (starting price, circulating supply, hourly volume as share of market cap,
+#          hourly volatility, stablecoin)
+TOKENS = {
+    'USDT': (1.0, 168e9, 0.025, 0.0002, True),
+    'USDC': (1.0, 72e9, 0.012, 0.0002, True),
+    'USDP': (1.0, 0.11e9, 0.004, 0.0004, True),
+    'DAI': (1.0, 5.3e9, 0.006, 0.0003, True),
+    'FRAX': (1.0, 0.32e9, 0.003, 0.0006, True),
+    'LINK': (21.5, 678e6, 0.004, 0.006, False),
+    'DOGE': (0.235, 150e9, 0.006, 0.007, False),
+    'BNB': (865.0, 139e6, 0.002, 0.004, False),
+}
+
+
+def generate(symbol, start_price, supply, volume_share, volatility, stablecoin, rng):
+    price = start_price
+    for hour in range(HOURS):
+        timestamp = END - timedelta(hours=HOURS - 1 - hour)
+        if stablecoin:
+            # Mean-reverting around the peg; supply drifts slowly
+            price = 1.0 + 0.85 * (price - 1.0) + rng.gauss(0, volatility)
+            supply *= 1 + rng.gauss(0.00002, 0.0003)
+        else:
+            price *= math.exp(rng.gauss(0, volatility))
+        market_cap = price * supply
+        # Trading is busier during the day (UTC) than at night
+        daily_cycle = 1 + 0.35 * math.sin((timestamp.hour - 8) / 24 * 2 * math.pi)
+        volume = market_cap * volume_share * daily_cycle * rng.lognormvariate(0, 0.25)
+        yield timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'), f'{price:.6g}', f'{market_cap:.0f}', f'{volume:.0f}'
+
+
+if __name__ == '__main__':
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    rng = random.Random(20250930)
+    for symbol, params in TOKENS.items():
+        path = os.path.join(FIXTURES_DIR, f'{symbol}.csv')
+        with open(path, 'w', newline='') as out:
+            writer = csv.writer(out)
+            writer.writerow(['timestamp', 'price', 'market_cap', 'volume'])
+            writer.writerows(generate(symbol, *params, rng))
+        print(f"📈 {symbol}: {HOURS} hourly rows -> {os.path.relpath(path)}")
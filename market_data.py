@@ -0,0 +1,508 @@
+"""
+Local time-series store of token market data for the dashboard charts
+
+Hourly price, market cap and traded volume per token live in a small SQLite
+database that is filled from the CSV fixtures in ``data/market/`` on first
+use, so the dashboard works offline. ``MarketDataStore.series`` returns the
+data for a time window pre-aggregated into fixed-size buckets,
+``MarketDataStore.points`` one field downsampled to the width of the chart
+and ``MarketDataStore.metrics`` the headline figures for the metric cards.
+
+Hourly and daily rollups, and a per-token summary, are updated for the
+buckets each ingest touches, so bucketed series and metrics never scan raw
+rows.
+"""
+
+import csv
+import gzip
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from operator import itemgetter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'market')
+DEFAULT_PATH = os.environ.get('MARKET_DATA_DB', os.path.join(tempfile.gettempdir(), 'market_data.db'))
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# window: (span, bucket size) in seconds
+WINDOWS = {
+    '1d': (DAY, HOUR),
+    '7d': (7 * DAY, 6 * HOUR),
+    '30d': (30 * DAY, DAY),
+    '90d': (90 * DAY, DAY),
+}
+FIELDS = ('price', 'market_cap', 'volume')
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+MIN_WIDTH = 10
+MAX_WIDTH = 4000
+MAX_CACHED_RESULTS = 64
+INGEST_BATCH_ROWS = 50000
+INGEST_TRANSACTION_ROWS = 1000000
+
+# rollup table: bucket size in seconds
+ROLLUPS = {
+    'token_rollup_hourly': HOUR,
+    'token_rollup_daily': DAY,
+}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS token_prices (
+    symbol TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    price REAL NOT NULL,
+    market_cap REAL NOT NULL,
+    volume REAL NOT NULL,
+    PRIMARY KEY (symbol, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS tokens (
+    symbol TEXT PRIMARY KEY,
+    first_ts INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    last_price REAL NOT NULL,
+    last_market_cap REAL NOT NULL
+);
+
+-- Bumped by every ingest, so memoized results from any process can be checked
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+''' + ''.join(f'''
+CREATE TABLE IF NOT EXISTS {table} (
+    symbol TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    price_sum REAL NOT NULL,
+    market_cap_sum REAL NOT NULL,
+    volume REAL NOT NULL,
+    last_ts INTEGER NOT NULL,
+    last_price REAL NOT NULL,
+    last_market_cap REAL NOT NULL,
+    PRIMARY KEY (symbol, bucket)
+) WITHOUT ROWID;
+''' for table in ROLLUPS)
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+class MarketDataStore:
+    """Token market data in SQLite, loaded from CSV fixtures when empty.
+
+    Results are memoized (LRU, per query) until new rows are loaded, by this
+    or any other process: each result is tagged with the database's data
+    version, which is read again on every call.
+    """
+
+    def __init__(self, path, fixtures_dir=FIXTURES_DIR):
+        self.path = path
+        self.fixtures_dir = fixtures_dir
+        self._lock = threading.RLock()
+        self._ready = False
+        self._results = OrderedDict()
+
+    def connect(self):
+        return sqlite3.connect(self.path)
+
+    def ensure_ready(self):
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            with self.connect() as conn:
+                conn.executescript(SCHEMA)
+                empty = conn.execute('SELECT 1 FROM token_prices LIMIT 1').fetchone() is None
+                if not empty and conn.execute('SELECT 1 FROM tokens LIMIT 1').fetchone() is None:
+                    # Stored before rollups existed
+                    for symbol, first, last in conn.execute(
+                        'SELECT symbol, MIN(ts), MAX(ts) FROM token_prices GROUP BY symbol'
+                    ).fetchall():
+                        update_rollups(conn, symbol, first, last)
+            if empty and self.fixtures_dir and os.path.isdir(self.fixtures_dir):
+                self.load_fixtures(self.fixtures_dir)
+            self._ready = True
+
+    def load_fixtures(self, directory):
+        """Load every ``<SYMBOL>.csv`` in ``directory``; return the number of rows."""
+        loaded = 0
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.csv'):
+                with open(os.path.join(directory, name), newline='') as fp:
+                    loaded += self.load_csv(name[:-len('.csv')].upper(), fp)
+        return loaded
+
+    def load_csv(self, symbol, fp):
+        """Load ``timestamp,price,market_cap,volume`` rows for ``symbol``."""
+        rows = (
+            (symbol, row['timestamp'], row['price'], row['market_cap'], row['volume'])
+            for row in csv.DictReader(fp)
+        )
+        stats = Counter()
+        return self.ingest(deduplicated_batches(validate(rows, stats), INGEST_BATCH_ROWS, stats))
+
+    def ingest(self, batches, transaction_rows=INGEST_TRANSACTION_ROWS, progress=None):
+        """Write batches of ``(symbol, ts, price, market_cap, volume)``; return the number of rows.
+
+        Each batch is one ``executemany`` and a transaction is committed about
+        every ``transaction_rows`` rows, in WAL mode with ``synchronous=NORMAL``.
+        Rollups are updated once per symbol at the end, over the range it
+        touched. ``progress(rows)`` is called after every commit.
+        """
+        written = 0
+        pending = 0
+        ranges = {}
+        conn = self.connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            for batch in batches:
+                conn.executemany('INSERT OR REPLACE INTO token_prices VALUES (?, ?, ?, ?, ?)', batch)
+                for symbol, ts, _, _, _ in batch:
+                    span = ranges.get(symbol)
+                    if span is None:
+                        ranges[symbol] = [ts, ts]
+                    elif ts < span[0]:
+                        span[0] = ts
+                    elif ts > span[1]:
+                        span[1] = ts
+                written += len(batch)
+                pending += len(batch)
+                if pending >= transaction_rows:
+                    conn.commit()
+                    pending = 0
+                    if progress:
+                        progress(written)
+            for symbol, (first, last) in ranges.items():
+                update_rollups(conn, symbol, first, last)
+            if written:
+                conn.execute(
+                    'INSERT INTO data_version VALUES (1, 1) ON CONFLICT (id) DO UPDATE SET version = version + 1'
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        if written and progress:
+            progress(written)
+        return written
+
+    def series(self, window):
+        """Bucketed series for every token over ``window`` (one of ``WINDOWS``).
+
+        The window ends at the newest row in the store rather than now, so
+        fixture data keeps working as it ages.
+        """
+        if window not in WINDOWS:
+            raise InvalidQuery(f'Unknown time window: {window}')
+        return self._memoized(('series', window), lambda: self._aggregate(window))
+
+    def points(self, window, width, field='market_cap', method='lttb'):
+        """``field`` for every token over ``window``, reduced to about ``width`` points.
+
+        Rows are read at full resolution and downsampled with LTTB or min/max
+        buckets (``method``), so the payload depends on the chart's pixel width
+        rather than on how much history the window covers.
+        """
+        if window not in WINDOWS:
+            raise InvalidQuery(f'Unknown time window: {window}')
+        if field not in FIELDS:
+            raise InvalidQuery(f'Unknown field: {field}')
+        if method not in DOWNSAMPLE_METHODS:
+            raise InvalidQuery(f'Unknown downsampling method: {method}')
+        width = max(MIN_WIDTH, min(int(width), MAX_WIDTH))
+        key = ('points', window, width, field, method)
+        return self._memoized(key, lambda: self._downsample(window, width, field, method))
+
+    def metrics(self, window):
+        """Headline figures for the metric cards, with their change over ``window``.
+
+        Reads a fixed number of rollup rows per token however much history
+        is stored.
+        """
+        if window not in WINDOWS:
+            raise InvalidQuery(f'Unknown time window: {window}')
+        return self._memoized(('metrics', window), lambda: self._metrics(window))
+
+    def data_version(self):
+        """Number of ingests committed to the database, by any process."""
+        self.ensure_ready()
+        with self.connect() as conn:
+            row = conn.execute('SELECT version FROM data_version').fetchone()
+        return row[0] if row else 0
+
+    def _memoized(self, key, compute):
+        version = self.data_version()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and entry[0] == version:
+                self._results.move_to_end(key)
+                return entry[1]
+        result = compute()
+        with self._lock:
+            self._results[key] = (version, result)
+            while len(self._results) > MAX_CACHED_RESULTS:
+                self._results.popitem(last=False)
+        return result
+
+    def _downsample(self, window, width, field, method):
+        # Imported here: NumPy is only needed for chart requests and is slow to
+        # import on a cold start
+        import numpy as np
+        from downsample import for_width
+
+        span, _ = WINDOWS[window]
+        column = FIELDS.index(field) + 1
+        tokens = {}
+        with self.connect() as conn:
+            end = conn.execute('SELECT MAX(last_ts) FROM tokens').fetchone()[0]
+            if end is None:
+                return {'window': window, 'field': field, 'method': method, 'width': width,
+                        'start': None, 'end': None, 'tokens': {}}
+            start = end - span
+            symbols = [symbol for (symbol,) in conn.execute('SELECT symbol FROM tokens ORDER BY symbol')]
+            for symbol in symbols:
+                rows = conn.execute(
+                    'SELECT ts, price, market_cap, volume FROM token_prices '
+                    'WHERE symbol = ? AND ts > ? AND ts <= ? ORDER BY ts',
+                    (symbol, start, end)
+                ).fetchall()
+                if not rows:
+                    continue
+                data = np.array(rows, dtype=float)
+                keep = for_width(data[:, 0], data[:, column], width, method)
+                values = data[keep, column]
+                tokens[symbol] = {
+                    't': data[keep, 0].astype(int).tolist(),
+                    field: np.round(values, 6).tolist() if field == 'price' else values.round().astype(int).tolist(),
+                    'latest': {
+                        'price': float(data[-1, 1]),
+                        'market_cap': float(data[-1, 2]),
+                        'volume': round(float(data[:, 3].sum())),
+                    },
+                }
+        return {'window': window, 'field': field, 'method': method, 'width': width,
+                'start': start, 'end': end, 'tokens': tokens}
+
+    def _aggregate(self, window):
+        span, bucket = WINDOWS[window]
+        table = 'token_rollup_daily' if bucket % DAY == 0 else 'token_rollup_hourly'
+        with self.connect() as conn:
+            end = conn.execute('SELECT MAX(last_ts) FROM tokens').fetchone()[0]
+            if end is None:
+                return {'window': window, 'bucket_seconds': bucket, 'start': None, 'end': None, 'tokens': {}}
+            start = end - span
+            tokens = {}
+            rows = conn.execute(
+                'SELECT symbol, bucket / :size * :size AS slot, SUM(price_sum) / SUM(samples), '
+                'SUM(market_cap_sum) / SUM(samples), SUM(volume) '
+                f'FROM {table} WHERE bucket > :start AND bucket <= :end '
+                'GROUP BY symbol, slot ORDER BY symbol, slot',
+                {'size': bucket, 'start': start, 'end': end}
+            )
+            for symbol, bucket_start, price, market_cap, volume in rows:
+                series = tokens.setdefault(symbol, {'t': [], 'price': [], 'market_cap': [], 'volume': []})
+                series['t'].append(bucket_start)
+                series['price'].append(round(price, 6))
+                series['market_cap'].append(round(market_cap))
+                series['volume'].append(round(volume))
+            for symbol, price, market_cap in conn.execute('SELECT symbol, last_price, last_market_cap FROM tokens'):
+                if symbol in tokens:
+                    series = tokens[symbol]
+                    series['latest'] = {
+                        'price': price,
+                        'market_cap': market_cap,
+                        'volume': sum(series['volume']),
+                    }
+        return {'window': window, 'bucket_seconds': bucket, 'start': start, 'end': end, 'tokens': tokens}
+
+    def _metrics(self, window):
+        span, _ = WINDOWS[window]
+        with self.connect() as conn:
+            symbols = [symbol for (symbol,) in conn.execute('SELECT symbol FROM tokens')]
+            end = conn.execute('SELECT MAX(last_ts) FROM tokens').fetchone()[0]
+            if end is None:
+                return {'window': window, 'as_of': None, 'total_market_cap': None, 'daily_volume': None}
+            now = end // HOUR * HOUR
+            before = now - span
+
+            def market_cap_at(bucket):
+                # Each token's market cap at the end of the latest hour up to ``bucket``
+                total = 0
+                for symbol in symbols:
+                    row = conn.execute(
+                        'SELECT last_market_cap FROM token_rollup_hourly '
+                        'WHERE symbol = ? AND bucket <= ? ORDER BY bucket DESC LIMIT 1',
+                        (symbol, bucket)
+                    ).fetchone()
+                    total += row[0] if row else 0
+                return total
+
+            def volume_24h(bucket):
+                return sum(
+                    conn.execute(
+                        'SELECT COALESCE(SUM(volume), 0) FROM token_rollup_hourly '
+                        'WHERE symbol = ? AND bucket > ? AND bucket <= ?',
+                        (symbol, bucket - DAY, bucket)
+                    ).fetchone()[0]
+                    for symbol in symbols
+                )
+
+            market_cap = market_cap_at(now)
+            volume = volume_24h(now)
+            return {
+                'window': window,
+                'as_of': end,
+                'total_market_cap': {'value': market_cap, 'change_pct': percent_change(market_cap, market_cap_at(before))},
+                'daily_volume': {'value': volume, 'change_pct': percent_change(volume, volume_24h(before))},
+            }
+
+
+def update_rollups(conn, symbol, first, last):
+    """Recompute the rollup buckets and token summary touched by ``symbol``'s rows in ``first``..``last``."""
+    finer = None
+    for table, size in ROLLUPS.items():
+        params = {'size': size, 'symbol': symbol, 'start': first // size * size, 'end': (last // size + 1) * size}
+        if finer is None:
+            conn.execute(
+                # With a single MAX() aggregate, SQLite takes the bare price and
+                # market_cap from the row holding it: the bucket's last row
+                f'INSERT OR REPLACE INTO {table} '
+                'SELECT symbol, ts / :size * :size AS slot, COUNT(*), SUM(price), SUM(market_cap), SUM(volume), '
+                'MAX(ts), price, market_cap '
+                'FROM token_prices WHERE symbol = :symbol AND ts >= :start AND ts < :end GROUP BY slot',
+                params
+            )
+        else:
+            # Coarser rollups are summed from the previous, finer one
+            conn.execute(
+                f'INSERT OR REPLACE INTO {table} '
+                'SELECT symbol, bucket / :size * :size AS slot, SUM(samples), SUM(price_sum), '
+                'SUM(market_cap_sum), SUM(volume), MAX(last_ts), last_price, last_market_cap '
+                f'FROM {finer} WHERE symbol = :symbol AND bucket >= :start AND bucket < :end GROUP BY slot',
+                params
+            )
+        finer = table
+    conn.execute(
+        'INSERT OR REPLACE INTO tokens '
+        'SELECT symbol, (SELECT MIN(ts) FROM token_prices WHERE symbol = :symbol), ts, price, market_cap '
+        'FROM token_prices WHERE symbol = :symbol ORDER BY ts DESC LIMIT 1',
+        {'symbol': symbol}
+    )
+
+
+def read_rows(path, symbol=None):
+    """Yield raw ``(symbol, timestamp, price, market_cap, volume)`` rows from a file.
+
+    Reads CSV, JSON arrays and JSON Lines, optionally gzipped. Rows without
+    a symbol get ``symbol`` or, failing that, the file name (``USDT.csv`` ->
+    ``USDT``). CSV and JSON Lines are streamed; a JSON array is parsed whole.
+    """
+    name = os.path.basename(path)
+    opener = open
+    if name.endswith('.gz'):
+        name = name[:-len('.gz')]
+        opener = gzip.open
+    name, ext = os.path.splitext(name)
+    default = (symbol or name).upper()
+    with opener(path, 'rt', newline='') as fp:
+        if ext == '.csv':
+            rows = csv.reader(fp)
+            header = [column.strip() for column in next(rows, [])]
+            missing = [column for column in ('timestamp',) + FIELDS if column not in header]
+            if missing:
+                raise ValueError(f'{path}: missing column(s) {", ".join(missing)}')
+            values = itemgetter(*(header.index(column) for column in ('timestamp',) + FIELDS))
+            at = header.index('symbol') if 'symbol' in header else None
+            for row in rows:
+                if not row:
+                    continue
+                if len(row) < len(header):
+                    # Short row: passed on empty so ``validate`` rejects it
+                    yield (default, None, None, None, None)
+                elif at is None:
+                    yield (default,) + values(row)
+                else:
+                    yield (row[at] or default,) + values(row)
+            return
+        if ext in ('.jsonl', '.ndjson'):
+            rows = (json.loads(line) for line in fp if line.strip())
+        elif ext == '.json':
+            rows = json.load(fp)
+        else:
+            raise ValueError(f'Unsupported file type: {path}')
+        for row in rows:
+            if not isinstance(row, dict):
+                row = {}
+            yield (row.get('symbol') or default, row.get('timestamp'),
+                   row.get('price'), row.get('market_cap'), row.get('volume'))
+
+
+def validate(rows, stats):
+    """Yield ``(symbol, ts, price, market_cap, volume)`` with parsed values from raw rows.
+
+    Rows with missing, unparseable, negative or non-finite values are
+    dropped and counted in ``stats['rejected']``.
+    """
+    valid = 0
+    symbols = {}
+    try:
+        for raw, timestamp, price, market_cap, volume in rows:
+            try:
+                symbol = symbols.get(raw)
+                if symbol is None:
+                    symbol = symbols[raw] = str(raw).strip().upper()
+                ts = parse_timestamp(timestamp)
+                price, market_cap, volume = float(price), float(market_cap), float(volume)
+            except (TypeError, ValueError, OverflowError, AttributeError):
+                stats['rejected'] += 1
+                continue
+            # NaN fails every comparison
+            if not (symbol and 0 <= price < math.inf and 0 <= market_cap < math.inf and 0 <= volume < math.inf):
+                stats['rejected'] += 1
+                continue
+            valid += 1
+            yield symbol, ts, price, market_cap, volume
+    finally:
+        stats['valid'] += valid
+
+
+def deduplicated_batches(records, size, stats):
+    """Group ``records`` into lists of up to ``size`` unique ``(symbol, ts)`` rows.
+
+    The last row for a key wins, both within a batch (counted in
+    ``stats['duplicates']``) and, through the primary key, across batches.
+    """
+    batch = {}
+    for record in records:
+        key = record[:2]
+        if key in batch:
+            stats['duplicates'] += 1
+        batch[key] = record
+        if len(batch) >= size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def percent_change(current, previous):
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+
+def parse_timestamp(value):
+    """Unix seconds from an ISO 8601 timestamp (``Z`` suffix allowed) or a number."""
+    if isinstance(value, str) and value[4:5] == '-':
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    return int(float(value))
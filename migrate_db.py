@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Apply schema migrations to an existing notebooks.db in place
+
+    python migrate_db.py            # create missing tables/indexes, backfill tags and search
+    python migrate_db.py --explain  # also print EXPLAIN QUERY PLAN for hot queries
+"""
+
+import os
+import sys
+from datetime import datetime
+
+from sqlalchemy import event, text
+
+import search_index
+from app import (
+    app, db, blob_store, Notebook, latest_notebook_update, parse_tags, public_notebooks, read_notebook_cells,
+    refresh_tag_counts, tagged, tags_for_names, user_notebooks
+)
+from pagination import encode_cursor, keyset_paginate
+
+
+def add_missing_columns():
+    """Add columns declared on the models that existing tables lack (nullable, no backfill)."""
+    added = []
+    with db.engine.begin() as connection:
+        inspector = db.inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+                    added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def apply_indexes():
+    """Create indexes declared on the models that an existing database lacks.
+
+    ``db.create_all()`` skips tables that already exist, so their new indexes
+    have to be created separately.
+    """
+    created = []
+    existing = set()
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing.update(index['name'] for index in db.inspect(connection).get_indexes(table.name))
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(connection)
+                    created.append(index.name)
+    return created
+
+
+def backfill_tags():
+    """Populate the tag tables from the legacy comma-separated Notebook.tags column."""
+    migrated = 0
+    for notebook in Notebook.query.filter(Notebook.tags.isnot(None), Notebook.tags != ''):
+        names = parse_tags(notebook.tags)
+        if [tag.name for tag in notebook.tag_list] != sorted(names):
+            # Only the association changes, so updated_at is left untouched
+            notebook.tag_list = tags_for_names(names)
+            migrated += 1
+    db.session.flush()
+    refresh_tag_counts()
+    db.session.commit()
+    return migrated
+
+
+def move_uploads_to_blob_store():
+    """Move legacy uploads/{uuid}_{filename} files into the content-addressed store."""
+    blob_root = os.path.normpath(blob_store.root) + os.sep
+    moved = 0
+    for notebook in Notebook.query.all():
+        legacy_path = notebook.file_path
+        if os.path.normpath(legacy_path).startswith(blob_root) or not os.path.exists(legacy_path):
+            continue
+        with open(legacy_path, 'rb') as legacy:
+            path, digest, _ = blob_store.save(legacy)
+        # Core UPDATE so updated_at keeps its value
+        db.session.execute(
+            db.update(Notebook).where(Notebook.id == notebook.id)
+            .values(file_path=path, content_hash=digest, updated_at=Notebook.updated_at)
+        )
+        db.session.commit()
+        os.remove(legacy_path)
+        moved += 1
+    return moved
+
+
+def read_search_text(notebook):
+    text_collector = search_index.TextCollector(app.config['SEARCH_TEXT_MAX_CHARS'])
+    for cell in read_notebook_cells(notebook.file_path):
+        text_collector.add(cell)
+    return text_collector.value()
+
+
+def rebuild_search_index():
+    """Index notebooks stored before the full-text index existed; return how many were indexed.
+
+    The index is rebuilt whole, and only when it is out of step with the
+    notebook table, so running the migration again does not re-read every file.
+    """
+    if not search_index.is_supported(db):
+        return 0
+    indexed = db.session.execute(text(f'SELECT COUNT(*) FROM {search_index.FTS_TABLE}')).scalar()
+    if indexed == Notebook.query.count():
+        return 0
+    return search_index.rebuild(db, Notebook, read_text=read_search_text)
+
+
+def hot_queries():
+    """The list queries behind index, dashboard, search and /api/notebooks,
+    and the Last-Modified lookup their cached responses are checked against."""
+    deep_page = encode_cursor((datetime.utcnow(), 2 ** 31))
+    queries = [
+        ('index', lambda: public_notebooks().order_by(Notebook.created_at.desc(), Notebook.id.desc()).limit(12).all()),
+        ('api_notebooks', lambda: keyset_paginate(public_notebooks(), [Notebook.created_at, Notebook.id])),
+        ('api_notebooks (next page)', lambda: keyset_paginate(
+            public_notebooks(), [Notebook.created_at, Notebook.id], cursor=deep_page)),
+        ('dashboard', lambda: keyset_paginate(user_notebooks(1), [Notebook.updated_at, Notebook.id])),
+        ('dashboard (next page)', lambda: keyset_paginate(
+            user_notebooks(1), [Notebook.updated_at, Notebook.id], cursor=deep_page)),
+        ('search by tag', lambda: keyset_paginate(
+            tagged(public_notebooks(), 'python'), [Notebook.created_at, Notebook.id])),
+        ('latest update', latest_notebook_update),
+    ]
+    if search_index.is_supported(db):
+        queries.append(('search by text', lambda: keyset_paginate(
+            search_index.filter_matches(
+                db.session.query(Notebook, search_index.rank.label('rank')).filter(Notebook.is_public.is_(True)),
+                Notebook, 'analysis'
+            ),
+            [search_index.rank, Notebook.id], descending=False, key=lambda row: (row.rank, row.Notebook.id)
+        )))
+    return queries
+
+
+def explain_hot_queries():
+    """Run each hot query and print SQLite's plan for the exact SQL it issued."""
+    for name, run in hot_queries():
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            captured.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            run()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        print(f"\n📊 {name}")
+        with db.engine.connect() as connection:
+            # The first statement is the list query; the rest are eager loads
+            statement, parameters = captured[0]
+            for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters):
+                print(f"   {row[-1]}")
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        print("🗄️  Creating missing tables and columns...")
+        db.create_all()
+        for name in add_missing_columns():
+            print(f"   + {name}")
+        print("📇 Creating missing indexes...")
+        for name in apply_indexes():
+            print(f"   + {name}")
+        print("🏷️  Backfilling tags from Notebook.tags...")
+        migrated = backfill_tags()
+        print(f"   Migrated tags for {migrated} notebooks")
+        print("📦 Moving uploads into the content-addressed blob store...")
+        moved = move_uploads_to_blob_store()
+        print(f"   Moved {moved} notebook files")
+        print("🔎 Filling the full-text search index...")
+        indexed = rebuild_search_index()
+        print(f"   Indexed {indexed} notebooks")
+        if '--explain' in sys.argv[1:] and db.engine.dialect.name == 'sqlite':
+            explain_hot_queries()
+        print("✅ Migration complete!")
@@ -0,0 +1,131 @@
+"""
+Binary image assets extracted from notebook outputs
+
+``image/png`` and ``image/jpeg`` outputs are decoded once and stored as
+content-addressed files, so the viewer can reference them by URL instead of
+shipping base64 inside the page. Identical images are stored once.
+
+The same store, with ``OUTPUT_TYPES``, keeps the full text of outputs the
+viewer shows truncated.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import time
+import uuid
+
+IMAGE_TYPES = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+}
+MIME_TYPES = {extension: mime for mime, extension in IMAGE_TYPES.items()}
+OUTPUT_TYPES = {
+    'text/plain': 'txt',
+    'text/html': 'html',
+}
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class AssetStore:
+    def __init__(self, root, types=IMAGE_TYPES):
+        self.root = root
+        self.extensions = set(types.values())
+
+    def path_for(self, digest, extension):
+        return os.path.join(self.root, digest[:2], f'{digest}.{extension}')
+
+    def lookup(self, digest, extension):
+        """Path of a stored asset, or None for unknown or malformed names."""
+        if not DIGEST_RE.match(digest) or extension not in self.extensions:
+            return None
+        path = self.path_for(digest, extension)
+        return path if os.path.exists(path) else None
+
+    def put(self, data, extension):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, extension)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique per writer: threads storing the same image at once each
+            # write their own copy, and whichever lands last wins
+            tmp_path = f'{path}.{uuid.uuid4().hex}.part'
+            try:
+                with open(tmp_path, 'wb') as out:
+                    out.write(data)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return digest
+
+    def extract_cell(self, cell):
+        """Store every image output of ``cell``; return ``[(mime, digest), ...]``."""
+        return [(mime, digest) for _, mime, digest in self._images(cell)]
+
+    def digests_in_cell(self, cell):
+        """Digests of the images ``cell`` references, without storing anything."""
+        return {digest for _, _, digest in self._images(cell, store=False)}
+
+    def collect_garbage(self, referenced_digests, grace_seconds=3600, dry_run=False):
+        """Delete assets whose digest is not referenced; return ``(removed paths, bytes freed)``."""
+        cutoff = time.time() - grace_seconds
+        removed = []
+        freed = 0
+        if not os.path.isdir(self.root):
+            return removed, freed
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                digest = name.split('.', 1)[0]
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                if digest in referenced_digests or stat.st_mtime > cutoff:
+                    continue
+                if not dry_run:
+                    os.remove(path)
+                removed.append(path)
+                freed += stat.st_size
+        return removed, freed
+
+    def externalize(self, nb, url_for_asset):
+        """Replace base64 image data in ``nb`` with ``output['images']`` URL references.
+
+        Missing files are written on the way, so notebooks uploaded before
+        extraction existed are served the same way.
+        """
+        for cell in nb.get('cells', []):
+            self.externalize_cell(cell, url_for_asset)
+        return nb
+
+    def externalize_cell(self, cell, url_for_asset):
+        for output, mime, digest in self._images(cell):
+            del output['data'][mime]
+            output.setdefault('images', []).append({
+                'mime': mime,
+                'url': url_for_asset(digest, IMAGE_TYPES[mime]),
+            })
+        return cell
+
+    def _images(self, cell, store=True):
+        found = []
+        for output in cell.get('outputs', []):
+            data = output.get('data') or {}
+            for mime, extension in IMAGE_TYPES.items():
+                encoded = data.get(mime)
+                if not encoded:
+                    continue
+                if isinstance(encoded, list):
+                    encoded = ''.join(encoded)
+                try:
+                    raw = base64.b64decode(encoded)
+                except (binascii.Error, ValueError):
+                    continue
+                digest = self.put(raw, extension) if store else hashlib.sha256(raw).hexdigest()
+                found.append((output, mime, digest))
+        return found
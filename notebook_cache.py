@@ -0,0 +1,84 @@
+"""
+In-process cache of rendered notebook payloads for the notebook viewer
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """LRU cache of rendered notebooks, bounded by total payload size in bytes.
+
+    Entries are keyed by ``(notebook_id, version)`` where ``version`` identifies
+    the file contents (mtime/size or content hash), so a re-uploaded file never
+    serves a stale render. Only one version per notebook is kept.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, notebook_id, version):
+        key = (notebook_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, notebook_id, version, value, size=None):
+        """Store ``value``; ``size`` defaults to ``len(value)``."""
+        if size is None:
+            size = len(value)
+        if size > self.max_bytes:
+            return
+        key = (notebook_id, version)
+        with self._lock:
+            self._discard(notebook_id)
+            self._entries[key] = (value, size)
+            self._versions[notebook_id] = version
+            self._size += size
+            while self._size > self.max_bytes:
+                (old_id, _), (_, old_size) = self._entries.popitem(last=False)
+                self._versions.pop(old_id, None)
+                self._size -= old_size
+                self.evictions += 1
+
+    def invalidate(self, notebook_id):
+        with self._lock:
+            self._discard(notebook_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _discard(self, notebook_id):
+        version = self._versions.pop(notebook_id, None)
+        if version is not None:
+            entry = self._entries.pop((notebook_id, version), None)
+            if entry is not None:
+                self._size -= entry[1]
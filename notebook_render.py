@@ -0,0 +1,268 @@
+"""
+Server-side HTML rendering of notebook cells for the notebook viewer
+
+Cells are converted one at a time so the view can stream them as they are
+produced. Code is syntax highlighted here with Pygments when it is installed;
+otherwise it is sent escaped and unhighlighted.
+
+Outputs larger than an ``OutputLimits`` budget are cut down at render time;
+the full output is handed to a store and fetched by the viewer on request.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+
+from markupsafe import escape
+
+HIGHLIGHT_STYLE = 'monokai'
+
+
+@lru_cache(maxsize=None)
+def _pygments():
+    # Imported on first use: loading Pygments and building the lexer is a
+    # large part of app start-up
+    try:
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import PythonLexer
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return highlight, PythonLexer(), HtmlFormatter(nowrap=True, style=HIGHLIGHT_STYLE)
+
+
+@lru_cache(maxsize=None)
+def highlight_css():
+    """CSS for the highlighted code spans, scoped to code cells."""
+    pygments = _pygments()
+    if pygments is None:
+        return ''
+    return pygments[2].get_style_defs('.code-cell .highlight')
+
+
+class OutputLimits:
+    """Byte and line budget for a single output.
+
+    ``save_full(text, extension)`` stores an output that went over budget and
+    returns the URL it can be loaded from.
+    """
+
+    def __init__(self, max_bytes, max_lines, save_full):
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.save_full = save_full
+
+    def measure(self, text):
+        """Return ``(bytes, lines, over budget)`` for ``text``."""
+        size = len(text.encode('utf-8'))
+        lines = text.count('\n') + 1
+        return size, lines, size > self.max_bytes or lines > self.max_lines
+
+    def truncate(self, text):
+        head = '\n'.join(text.split('\n', self.max_lines)[:self.max_lines])
+        return head.encode('utf-8')[:self.max_bytes].decode('utf-8', 'ignore')
+
+
+def full_output_digests(cell):
+    """SHA-256 digests under which ``cell``'s outputs would be stored in full."""
+    return {
+        hashlib.sha256(text.encode('utf-8')).hexdigest()
+        for output in cell.get('outputs', [])
+        for text, _ in _output_texts(output)
+    }
+
+
+def render_cell(cell, index, limits=None):
+    if cell.get('cell_type') == 'code':
+        return render_code_cell(cell, index, limits)
+    if cell.get('cell_type') == 'markdown':
+        return render_markdown_cell(cell, index)
+    return ''
+
+
+def render_alert(level, message):
+    return f'''
+        <div class="alert alert-{level}">
+            <i class="fas fa-exclamation-triangle"></i>
+            {escape(message)}
+        </div>
+    '''
+
+
+def render_code_cell(cell, index, limits=None):
+    source = _text(cell.get('source', ''))
+    parts = [f'''
+        <div class="cell code-cell">
+            <div class="cell-header">
+                <i class="fas fa-code"></i>
+                <span>Code Cell {index + 1}</span>
+            </div>
+            <div class="cell-content">
+                <pre><code class="highlight language-python">{_highlight(source)}</code></pre>
+            </div>
+        </div>
+    ''']
+    for output in cell.get('outputs', []):
+        parts.append(render_output(output, limits))
+    return ''.join(parts)
+
+
+def render_output(output, limits=None):
+    output_type = output.get('output_type')
+    if output_type in ('execute_result', 'display_data'):
+        data = output.get('data') or {}
+        parts = []
+        if 'text/plain' in data:
+            parts.append(_output_block('terminal', 'Output', _text_output(_text(data['text/plain']), limits)))
+        if 'text/html' in data:
+            parts.append(_output_block('chart-bar', 'Output (HTML)', _html_output(_text(data['text/html']), limits)))
+        images = output.get('images') or []
+        if images:
+            parts.append(_output_block(
+                'image', 'Output (Image)',
+                f'<img src="{escape(images[0]["url"])}" alt="Output image" loading="lazy" decoding="async" '
+                'style="max-width: 100%; height: auto;">'
+            ))
+        return ''.join(parts)
+    if output_type == 'stream':
+        is_error = output.get('name') == 'stderr'
+        return _output_block(
+            'exclamation-triangle' if is_error else 'terminal', 'Error' if is_error else 'Output',
+            _text_output(_text(output.get('text', '')), limits), error=is_error
+        )
+    if output_type == 'error':
+        return _output_block(
+            'exclamation-triangle', 'Error', _text_output(_text(output.get('traceback', '')), limits), error=True
+        )
+    return ''
+
+
+def render_markdown_cell(cell, index):
+    return f'''
+        <div class="cell markdown-cell">
+            <div class="cell-header">
+                <i class="fas fa-markdown"></i>
+                <span>Markdown Cell {index + 1}</span>
+            </div>
+            <div class="cell-content">
+                <div class="markdown-content">{render_markdown(_text(cell.get('source', '')))}</div>
+            </div>
+        </div>
+    '''
+
+
+_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_ITALIC = re.compile(r'\*(.*?)\*')
+_CODE = re.compile(r'`(.*?)`')
+
+
+def render_markdown(text):
+    # Same minimal subset the viewer has always supported. The source is
+    # escaped first so raw HTML in a cell is shown as text, never as markup
+    text = str(escape(text))
+    text = _BOLD.sub(r'<strong>\1</strong>', text)
+    text = _ITALIC.sub(r'<em>\1</em>', text)
+    text = _CODE.sub(r'<code>\1</code>', text)
+    return text.replace('\n', '<br>')
+
+
+def _output_block(icon, label, body, error=False):
+    return f'''
+        <div class="cell output-cell{' error' if error else ''}">
+            <div class="cell-header">
+                <i class="fas fa-{icon}"></i>
+                <span>{label}</span>
+            </div>
+            <div class="cell-content">
+                {body}
+            </div>
+        </div>
+    '''
+
+
+def _text_output(text, limits):
+    if limits is None:
+        return _pre(text)
+    size, lines, over = limits.measure(text)
+    if not over:
+        return _pre(text)
+    return _pre(limits.truncate(text)) + _load_full_button(
+        limits.save_full(text, 'txt'), 'text', size, lines, 'showing the beginning'
+    )
+
+
+def _html_output(html, limits):
+    if limits is not None:
+        size, lines, over = limits.measure(html)
+        if over:
+            # Cutting HTML short would leave broken markup, so show none of it
+            return _load_full_button(limits.save_full(html, 'html'), 'html', size, lines, 'not shown')
+    return f'<div class="html-output">{_sandboxed(html)}</div>'
+
+
+def _sandboxed(html):
+    # Uploaded HTML runs in a frame of its own: scripts are disabled and
+    # unbalanced markup cannot swallow the cells that follow. Same-origin
+    # only lets the viewer size the frame to its content
+    return (
+        f'<iframe class="html-output-frame" sandbox="allow-same-origin" '
+        f'srcdoc="{escape(_FRAME_STYLE + html)}"></iframe>'
+    )
+
+
+_FRAME_STYLE = (
+    '<style>body{margin:0;font-family:-apple-system,BlinkMacSystemFont,"Segoe UI",Roboto,sans-serif;font-size:13px}'
+    'table{border-collapse:collapse;margin:16px 0}th,td{border:1px solid #dee2e6;padding:8px 12px;'
+    'text-align:left;vertical-align:top}th{background-color:#f8f9fa;font-weight:600}img{max-width:100%;height:auto}'
+    '</style>'
+)
+
+
+def _load_full_button(url, kind, size, lines, shown):
+    # Full HTML goes into the same styled sandbox as inline HTML outputs
+    frame_style = f' data-frame-style="{escape(_FRAME_STYLE)}"' if kind == 'html' else ''
+    return f'''
+                <div class="output-truncated">
+                    <span>Large output ({_format_size(size)}, {lines:,} lines), {shown}.</span>
+                    <button type="button" class="load-full-output" data-url="{escape(url)}" data-kind="{kind}"{frame_style}>
+                        <i class="fas fa-expand"></i> Load full output
+                    </button>
+                </div>
+    '''
+
+
+def _output_texts(output):
+    output_type = output.get('output_type')
+    if output_type in ('execute_result', 'display_data'):
+        data = output.get('data') or {}
+        if 'text/plain' in data:
+            yield _text(data['text/plain']), 'txt'
+        if 'text/html' in data:
+            yield _text(data['text/html']), 'html'
+    elif output_type == 'stream':
+        yield _text(output.get('text', '')), 'txt'
+    elif output_type == 'error':
+        yield _text(output.get('traceback', '')), 'txt'
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def _pre(text):
+    return f'<pre><code class="language-text">{escape(text)}</code></pre>'
+
+
+def _highlight(source):
+    pygments = _pygments()
+    if pygments is None:
+        return str(escape(source))
+    highlight, lexer, formatter = pygments
+    return highlight(source, lexer, formatter)
+
+
+def _text(value):
+    return ''.join(value) if isinstance(value, list) else (value or '')
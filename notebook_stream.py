@@ -0,0 +1,314 @@
+"""
+Bounded-memory helpers for uploaded notebooks
+
+``save_stream`` copies an upload to disk in fixed-size chunks while hashing it,
+and ``scan_notebook`` walks the notebook JSON incrementally: cells are skipped
+(or handed over one at a time) without ever materializing the whole document,
+and the top-level ``metadata`` object is the only value parsed in full.
+
+The byte span of every cell can be saved in a sidecar index
+(``<notebook>.cells``) so any range of cells is read with a couple of seeks
+instead of a scan.
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+_STRUCTURAL = re.compile(rb'["\[\]{}]')
+_SCALAR_END = re.compile(rb'[,\]}\s]')
+_WHITESPACE = b' \t\r\n'
+
+CELL_INDEX_SUFFIX = '.cells'
+_SPAN = struct.Struct('<QQ')
+
+
+class NotebookFormatError(ValueError):
+    pass
+
+
+def save_stream(stream, path, chunk_size=CHUNK_SIZE):
+    """Write ``stream`` to ``path`` chunk by chunk; return ``(sha256 hex, size)``."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as out:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def scan_notebook(path, on_cell=None, metadata_only=False, chunk_size=CHUNK_SIZE):
+    """Scan a notebook file without loading it.
+
+    Returns ``{'metadata': dict, 'nbformat': int, 'cells': [(start, end), ...]}``
+    where each cell span is the byte range of that cell's JSON object in the
+    file. ``on_cell(index, raw_bytes)`` is called for every cell when given;
+    only one cell is held in memory at a time. With ``metadata_only`` the scan
+    stops as soon as the ``metadata`` object has been read.
+    """
+    result = {'metadata': {}, 'nbformat': None, 'cells': []}
+    with open(path, 'rb') as fp:
+        reader = _Reader(fp, chunk_size)
+        for key in _top_level_keys(reader):
+            if key == 'cells':
+                for start, end, raw in _cells(reader, capture=on_cell is not None):
+                    if on_cell is not None:
+                        on_cell(len(result['cells']), raw)
+                    result['cells'].append((start, end))
+            elif key == 'metadata':
+                result['metadata'] = reader.read_value()
+                if metadata_only:
+                    return result
+            elif key == 'nbformat':
+                result['nbformat'] = reader.read_value()
+            else:
+                reader.skip_value()
+    return result
+
+
+def iter_cells(path, chunk_size=CHUNK_SIZE):
+    """Yield the raw JSON bytes of each cell in order, one cell in memory at a time.
+
+    Raises ``NotebookFormatError`` if the file has no top-level ``cells`` list
+    (e.g. nbformat 3 notebooks, which keep cells under ``worksheets``).
+    """
+    with open(path, 'rb') as fp:
+        reader = _Reader(fp, chunk_size)
+        for key in _top_level_keys(reader):
+            if key == 'cells':
+                for _, _, raw in _cells(reader, capture=True):
+                    yield raw
+                return
+            reader.skip_value()
+    raise NotebookFormatError('notebook has no "cells" list')
+
+
+def cell_index_path(path):
+    return path + CELL_INDEX_SUFFIX
+
+
+def write_cell_index(path, spans):
+    """Save the ``(start, end)`` byte span of each cell of ``path`` to its index."""
+    index_path = cell_index_path(path)
+    # Unique per writer, so concurrent first requests never share a file
+    tmp_path = f'{index_path}.{uuid.uuid4().hex}.part'
+    try:
+        with open(tmp_path, 'wb') as out:
+            for start, end in spans:
+                out.write(_SPAN.pack(start, end))
+        os.replace(tmp_path, index_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def ensure_cell_index(path, result=None):
+    """Build the cell index of ``path`` if it is missing; return the cell count.
+
+    ``result`` is a ``scan_notebook`` result to reuse instead of scanning again.
+    Raises ``NotebookFormatError`` for notebooks older than nbformat 4, whose
+    cells cannot be indexed.
+    """
+    index_path = cell_index_path(path)
+    if not os.path.exists(index_path):
+        result = result or scan_notebook(path)
+        if (result['nbformat'] or 0) < 4:
+            raise NotebookFormatError('only nbformat 4 notebooks can be indexed')
+        write_cell_index(path, result['cells'])
+    return os.path.getsize(index_path) // _SPAN.size
+
+
+def read_cell_range(path, start, count):
+    """Parse cells ``start`` to ``start + count`` of ``path`` using its index."""
+    with open(cell_index_path(path), 'rb') as index:
+        index.seek(start * _SPAN.size)
+        spans = index.read(count * _SPAN.size)
+    cells = []
+    with open(path, 'rb') as fp:
+        for cell_start, cell_end in _SPAN.iter_unpack(spans):
+            fp.seek(cell_start)
+            cells.append(json.loads(fp.read(cell_end - cell_start)))
+    return cells
+
+
+def _top_level_keys(reader):
+    # Yields each key; the caller must consume the value before resuming
+    reader.expect(b'{')
+    if reader.peek() == b'}':
+        return
+    while True:
+        yield reader.read_key()
+        separator = reader.next_token()
+        if separator == b'}':
+            return
+        if separator != b',':
+            raise reader.error('expected "," or "}"')
+
+
+def _cells(reader, capture):
+    reader.expect(b'[')
+    if reader.peek() == b']':
+        reader.next_token()
+        return
+    while True:
+        start = reader.value_start()
+        if capture:
+            raw = reader.capture_value()
+        else:
+            raw = None
+            reader.skip_value()
+        yield start, reader.offset, raw
+        separator = reader.next_token()
+        if separator == b']':
+            return
+        if separator != b',':
+            raise reader.error('expected "," or "]" in cells')
+
+
+class _Reader:
+    """Forward-only JSON reader over a binary file with a sliding buffer."""
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = bytearray()
+        self.pos = 0
+        self.base = 0
+        self.mark = None
+        self.eof = False
+
+    @property
+    def offset(self):
+        return self.base + self.pos
+
+    def error(self, message):
+        return NotebookFormatError(f'{message} at byte {self.offset}')
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed bytes unless a value is being captured
+        consumed = min(self.pos, len(self.buf)) if self.mark is None else self.mark - self.base
+        del self.buf[:consumed]
+        self.buf += chunk
+        self.base += consumed
+        self.pos -= consumed
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos:self.pos + 1] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return
+
+    def peek(self):
+        self._skip_whitespace()
+        if self.pos >= len(self.buf):
+            raise self.error('unexpected end of file')
+        return bytes(self.buf[self.pos:self.pos + 1])
+
+    def next_token(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, token):
+        if self.next_token() != token:
+            raise self.error(f'expected {token.decode()!r}')
+
+    def value_start(self):
+        self.peek()
+        return self.offset
+
+    def _search(self, pattern):
+        """Advance to the next match of ``pattern``; return the matched byte."""
+        while True:
+            match = pattern.search(self.buf, self.pos)
+            if match:
+                self.pos = match.start() + 1
+                return bytes(match.group())
+            self.pos = len(self.buf)
+            if not self._fill():
+                raise self.error('unexpected end of file')
+
+    def _skip_string(self):
+        # Assumes the opening quote has been consumed. bytes.find is much faster
+        # than a regex over long runs such as base64-encoded images.
+        while True:
+            quote = self.buf.find(b'"', self.pos)
+            end = quote if quote >= 0 else len(self.buf)
+            backslash = self.buf.find(b'\\', self.pos, end)
+            if backslash >= 0:
+                # Skip the escaped character, which may be in the next chunk
+                self.pos = backslash + 2
+                while self.pos > len(self.buf):
+                    if not self._fill():
+                        raise self.error('unexpected end of file')
+            elif quote >= 0:
+                self.pos = quote + 1
+                return
+            else:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise self.error('unexpected end of file')
+
+    def skip_value(self):
+        token = self.next_token()
+        if token == b'"':
+            self._skip_string()
+        elif token in (b'{', b'['):
+            depth = 1
+            while depth:
+                token = self._search(_STRUCTURAL)
+                if token == b'"':
+                    self._skip_string()
+                elif token in (b'{', b'['):
+                    depth += 1
+                else:
+                    depth -= 1
+        else:
+            while True:
+                match = _SCALAR_END.search(self.buf, self.pos)
+                if match:
+                    self.pos = match.start()
+                    return
+                self.pos = len(self.buf)
+                if not self._fill():
+                    return
+
+    def capture_value(self):
+        start = self.value_start()
+        self.mark = start
+        try:
+            self.skip_value()
+            return bytes(self.buf[start - self.base:self.pos])
+        finally:
+            self.mark = None
+
+    def read_value(self):
+        try:
+            return json.loads(self.capture_value())
+        except ValueError as e:
+            raise self.error(f'invalid JSON value ({e})')
+
+    def read_key(self):
+        if self.peek() != b'"':
+            raise self.error('expected object key')
+        key = self.read_value()
+        self.expect(b':')
+        return key
@@ -0,0 +1,114 @@
+"""
+Keyset (cursor) pagination helpers
+
+Pages are selected with ``WHERE (sort, id) < (:sort, :id)`` against the last
+row of the previous page instead of ``OFFSET``, so every page costs the same
+index range scan no matter how deep a client pages. Cursors are opaque,
+URL-safe tokens that encode the boundary row's sort key and the direction.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import request, url_for
+from sqlalchemy import DateTime, literal, tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values, direction='next'):
+    payload = {
+        'k': [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        'd': direction,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(token, columns):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = payload['k']
+        direction = payload['d']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursor(token)
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor(token)
+    try:
+        values = [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+            for column, value in zip(columns, values)
+        ]
+    except (TypeError, ValueError):
+        raise InvalidCursor(token)
+    return values, direction
+
+
+def keyset_paginate(query, columns, cursor=None, limit=20, descending=True, key=None):
+    """Return one ``Page`` of ``query`` ordered by ``columns``.
+
+    ``columns`` are the sort expressions; the last one must be unique (usually
+    the primary key) so the ordering is total. ``key`` maps a result item to
+    its sort values and defaults to reading each column's attribute name.
+    """
+    if key is None:
+        names = [column.key for column in columns]
+        key = lambda item: tuple(getattr(item, name) for name in names)
+
+    direction = 'next'
+    query_descending = descending
+    if cursor:
+        values, direction = decode_cursor(cursor, columns)
+        # Walking backwards flips the comparison and the ordering
+        if direction == 'prev':
+            query_descending = not descending
+        row = tuple_(*columns)
+        bound = tuple_(*[literal(value, column.type) for column, value in zip(columns, values)])
+        query = query.filter(row < bound if query_descending else row > bound)
+
+    ordering = [column.desc() if query_descending else column.asc() for column in columns]
+    items = query.order_by(None).order_by(*ordering).limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    if direction == 'prev':
+        items.reverse()
+        next_cursor = encode_cursor(key(items[-1]), 'next') if items else None
+        prev_cursor = encode_cursor(key(items[0]), 'prev') if items and has_more else None
+    else:
+        next_cursor = encode_cursor(key(items[-1]), 'next') if items and has_more else None
+        prev_cursor = encode_cursor(key(items[0]), 'prev') if items and cursor else None
+    return Page(items, next_cursor, prev_cursor)
+
+
+def page_url(cursor):
+    """URL of the current view with ``cursor`` swapped in, for next/prev links."""
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    return url_for(request.endpoint, **request.view_args, **args)
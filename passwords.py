@@ -0,0 +1,75 @@
+"""
+Password hashing with a configurable algorithm and cost, computed off the
+request threads
+
+Hashes use Werkzeug's ``method`` strings (``pbkdf2:sha256:600000``,
+``scrypt:32768:8:1``, ...). Stored hashes made with other parameters still
+verify, and ``needs_rehash`` tells the login view to upgrade them. Hashing
+and verification run on a small thread pool: the KDFs release the GIL, so at
+most ``workers`` cores are spent on them however many logins arrive at once,
+and requests beyond ``max_pending`` queued ones are refused with
+``HasherBusy`` rather than piling up.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, method, workers=2, max_pending=32):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._prefix = method_prefix(method)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if ``pwhash`` was not made with the configured method and parameters."""
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Too many password checks in progress')
+        try:
+            return self._pool().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+        return self._executor
+
+
+def method_prefix(method):
+    """The method part Werkzeug stores in hashes made with ``method``.
+
+    Werkzeug fills in the parameters a method string leaves out
+    (``scrypt`` -> ``scrypt:32768:8:1``); this does the same without
+    computing a hash.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Import-time profile and cold-start check for the app entry points
+
+    python profile_startup.py                # slowest imports of vercel_app
+    python profile_startup.py app --top 20   # ...or of the full app
+    python profile_startup.py --check        # fail if the Vercel p50 cold start is over target
+
+The cold-start target is the p50 of importing vercel_app and serving its
+first request in a fresh interpreter (see bench_vercel.py).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from bench_vercel import cold_start
+
+COLD_START_TARGET_MS = 300
+
+
+def import_times(module):
+    """Run ``python -X importtime`` on ``module``; return ``[(name, self us, cumulative us, depth)]``."""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), check=True, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    # Children are listed before their parent; keep only the module's own
+    # subtree, not what the interpreter imported at start-up
+    end = max(i for i, row in enumerate(rows) if row[0] == module and row[3] == 0)
+    start = end
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+    return rows[start:end + 1]
+
+
+def report(module, top):
+    rows = import_times(module)
+    total = rows[-1][2]
+    print(f"⏱️  import {module}: {total / 1000:.1f} ms")
+    print("📦 Direct imports by cumulative time:")
+    direct = [row for row in rows if row[3] == 1]
+    for name, _, cumulative, _ in sorted(direct, key=lambda row: -row[2])[:top]:
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+    print("🐢 Modules by self time:")
+    for name, self_us, _, _ in sorted(rows, key=lambda row: -row[1])[:top]:
+        print(f"   {self_us / 1000:8.1f} ms  {name}")
+
+
+def check(runs):
+    p50 = statistics.median(cold_start('', runs)) * 1000
+    within = p50 <= COLD_START_TARGET_MS
+    print(f"{'✅' if within else '❌'} vercel_app cold start p50 {p50:.1f} ms (target {COLD_START_TARGET_MS} ms, {runs} runs)")
+    return within
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('module', nargs='?', default='vercel_app')
+    parser.add_argument('--top', type=int, default=15, help='rows per table')
+    parser.add_argument('--check', action='store_true', help='enforce the cold-start target')
+    parser.add_argument('--runs', type=int, default=15, help='cold starts measured by --check')
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check(args.runs) else 1)
+    report(args.module, args.top)
@@ -0,0 +1,102 @@
+"""
+Per-request SQL statement counting and timing
+
+Every statement executed by any SQLAlchemy engine is counted against the
+recorders active on the current thread: one per request (logged when the
+request ends) plus any opened with ``track_queries()``, which lets tests
+assert on the number of queries a code path issues::
+
+    with track_queries() as stats:
+        client.get('/api/notebooks')
+    assert stats.count <= 3
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_local = threading.local()
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements.append(statement)
+
+
+def _active():
+    if not hasattr(_local, 'recorders'):
+        _local.recorders = []
+    return _local.recorders
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats()
+    recorders = _active()
+    recorders.append(stats)
+    try:
+        yield stats
+    finally:
+        recorders.remove(stats)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start'].pop()
+    for stats in _active():
+        stats.record(statement, duration)
+
+
+def init_query_stats(app):
+    """Log the statement count and SQL time of every request.
+
+    Requests issuing more than ``QUERY_COUNT_WARN_THRESHOLD`` statements are
+    logged as warnings. With ``QUERY_STATS_HEADERS`` enabled the numbers are
+    also returned in ``X-Query-Count`` and ``Server-Timing`` headers.
+    """
+    app.config.setdefault('QUERY_COUNT_WARN_THRESHOLD', 20)
+    app.config.setdefault('QUERY_STATS_HEADERS', False)
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+        _active().append(g.query_stats)
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        _active().remove(stats)
+        duration_ms = stats.duration * 1000
+        log = app.logger.warning if stats.count > app.config['QUERY_COUNT_WARN_THRESHOLD'] else app.logger.debug
+        log('%s %s: %d SQL statements in %.1f ms', request.method, request.path, stats.count, duration_ms)
+        if app.config['QUERY_STATS_HEADERS']:
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['Server-Timing'] = f'db;dur={duration_ms:.1f};desc="{stats.count} queries"'
+        return response
+
+    @app.teardown_request
+    def discard_query_stats(exc):
+        stats = g.pop('query_stats', None)
+        if stats is not None and stats in _active():
+            _active().remove(stats)
+
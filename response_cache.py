@@ -0,0 +1,126 @@
+"""
+In-process cache of rendered responses with conditional GET support
+
+Cached pages are stored with a strong ETag (a hash of the body), so a repeat
+request is answered from memory and a revalidating client gets a bodiless
+304. Entries expire after ``ttl`` seconds; writers call ``clear`` to drop
+them immediately. The cache is per process, so views that can be changed by
+other processes (the background worker, other web workers) pass a
+``last_modified`` callable: every hit re-runs it and drops the entry when the
+data has moved on.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+
+class CachedResponse:
+    __slots__ = ('body', 'mimetype', 'etag', 'last_modified', 'expires_at')
+
+    def __init__(self, body, mimetype, last_modified, expires_at):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """TTL + LRU cache of GET responses keyed by path, query string and viewer.
+
+    ``vary`` returns what, besides the URL, a page depends on (e.g. the
+    logged-in user id, since the navigation bar differs per user).
+    """
+
+    def __init__(self, ttl, max_entries, vary=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.vary = vary
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, last_modified=None):
+        """Return the live entry for ``key`` dated ``last_modified``, or ``None``."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now or entry.last_modified != last_modified:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def cached(self, last_modified=None):
+        """Serve a view from the cache and answer conditional requests.
+
+        ``last_modified`` dates each entry and is called again on every hit;
+        an entry whose date no longer matches is rendered afresh. Requests
+        with pending flash messages bypass the cache so the messages are shown.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or '_flashes' in session:
+                    return view(*args, **kwargs)
+                viewer = self.vary() if self.vary else None
+                key = (request.full_path, viewer)
+                modified = last_modified() if last_modified else None
+                entry = self.get(key, modified)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    entry = CachedResponse(
+                        response.get_data(), response.mimetype, modified, time.monotonic() + self.ttl
+                    )
+                    self.put(key, entry)
+                response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+                return conditional_response(response, entry.etag, entry.last_modified, private=viewer is not None)
+            return wrapper
+        return decorator
+
+
+def conditional_response(response, etag, last_modified=None, private=False):
+    """Attach validators to ``response`` and turn it into a 304 if the client's copy is current."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Clients may keep the page but must revalidate it before reuse
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    return response.make_conditional(request)
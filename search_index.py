@@ -0,0 +1,152 @@
+"""
+SQLite FTS5 full-text index for notebook search
+
+The ``notebook_fts`` virtual table mirrors each notebook's title, description
+and tags plus the cell source text extracted after upload. Rows share their
+rowid with ``notebook.id`` and are kept in sync by mapper events, so any code
+path that inserts, edits or deletes a ``Notebook`` updates the index in the same
+transaction.
+"""
+
+import re
+
+from sqlalchemy import DDL, column, event, false, literal_column, table, text
+
+FTS_TABLE = 'notebook_fts'
+
+CREATE_FTS = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, description, tags, content, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+).execute_if(dialect='sqlite')
+
+fts_table = table(FTS_TABLE, column('rowid'))
+
+# bm25 column weights: title, description, tags, cell content (lower is better)
+rank = literal_column(f'bm25({FTS_TABLE}, 10.0, 4.0, 6.0, 1.0)')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def init_search_index(db, model):
+    """Create the FTS table alongside ``db.create_all()`` and sync it on writes."""
+    event.listen(db.metadata, 'after_create', CREATE_FTS)
+    event.listen(model, 'after_insert', _after_insert)
+    event.listen(model, 'after_update', _after_update)
+    event.listen(model, 'after_delete', _after_delete)
+
+
+def is_supported(db):
+    return db.engine.dialect.name == 'sqlite'
+
+
+def extract_text(nb):
+    """Return the searchable text of a parsed notebook (markdown and code sources)."""
+    return '\n'.join(filter(None, (cell_text(cell) for cell in nb.get('cells', []))))
+
+
+def cell_text(cell):
+    if cell.get('cell_type') not in ('markdown', 'code'):
+        return ''
+    source = cell.get('source', '')
+    return ''.join(source) if isinstance(source, list) else source
+
+
+class TextCollector:
+    """Accumulate searchable text from parsed cells, up to ``max_chars``."""
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.parts = []
+        self.size = 0
+
+    def add(self, cell):
+        if self.size < self.max_chars:
+            text = cell_text(cell)[:self.max_chars - self.size]
+            self.parts.append(text)
+            self.size += len(text)
+
+    def value(self):
+        return '\n'.join(filter(None, self.parts))
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every term must match, as a prefix."""
+    terms = TOKEN_RE.findall(query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def filter_matches(query, model, search_query):
+    """Restrict ``query`` to rows of ``model`` whose indexed text matches ``search_query``.
+
+    Select ``rank`` alongside the model to order results by relevance. A
+    query without any word characters matches nothing.
+    """
+    query = query.join(fts_table, fts_table.c.rowid == model.id)
+    expression = match_expression(search_query)
+    if not expression:
+        # An empty MATCH is an FTS5 syntax error
+        return query.filter(false())
+    return query.filter(text(f'{FTS_TABLE} MATCH :expression').bindparams(expression=expression))
+
+
+def rebuild(db, model, read_text=None):
+    """Re-index every notebook, e.g. for databases created before the index existed."""
+    db.session.execute(text(f'DELETE FROM {FTS_TABLE}'))
+    count = 0
+    for notebook in model.query.all():
+        content = ''
+        if read_text is not None:
+            try:
+                content = read_text(notebook)
+            except Exception:
+                content = ''
+        _insert(db.session.connection(), notebook, content)
+        count += 1
+    db.session.commit()
+    return count
+
+
+def _insert(connection, notebook, content):
+    connection.execute(
+        text(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, tags, content) '
+            'VALUES (:id, :title, :description, :tags, :content)'
+        ),
+        {
+            'id': notebook.id,
+            'title': notebook.title or '',
+            'description': notebook.description or '',
+            'tags': notebook.tags or '',
+            'content': content or '',
+        }
+    )
+
+
+def _after_insert(mapper, connection, target):
+    if connection.dialect.name != 'sqlite':
+        return
+    _insert(connection, target, getattr(target, 'search_text', ''))
+
+
+def _after_update(mapper, connection, target):
+    if connection.dialect.name != 'sqlite':
+        return
+    params = {
+        'id': target.id,
+        'title': target.title or '',
+        'description': target.description or '',
+        'tags': target.tags or '',
+    }
+    columns = 'title = :title, description = :description, tags = :tags'
+    # Cell text is only re-indexed when it was extracted again
+    if getattr(target, 'search_text', None) is not None:
+        columns += ', content = :content'
+        params['content'] = target.search_text
+    connection.execute(text(f'UPDATE {FTS_TABLE} SET {columns} WHERE rowid = :id'), params)
+
+
+def _after_delete(mapper, connection, target):
+    if connection.dialect.name != 'sqlite':
+        return
+    connection.execute(text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'), {'id': target.id})
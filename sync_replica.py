@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Copy the primary SQLite database to a local read replica
+
+    DATABASE_REPLICA_URL=sqlite:////abs/path/replica.db python sync_replica.py
+    python sync_replica.py --every 5   # keep copying every 5 seconds
+
+A stand-in for real replication when trying out replica reads locally. The
+copy uses SQLite's online backup API, so the app can keep writing meanwhile.
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+
+from sqlalchemy.engine import make_url
+
+from app import app, db
+from db_config import REPLICA_BIND
+
+
+def sqlite_path(engine):
+    url = make_url(str(engine.url))
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return None
+    return url.database
+
+
+def sync(primary_path, replica_path):
+    start = time.perf_counter()
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--every', type=float, help='repeat every N seconds until interrupted')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if REPLICA_BIND not in db.engines:
+            print("❌ No replica configured; set DATABASE_REPLICA_URL")
+            sys.exit(1)
+        primary_path = sqlite_path(db.engines[None])
+        replica_path = sqlite_path(db.engines[REPLICA_BIND])
+    if not primary_path or not replica_path:
+        print("❌ Both the primary and the replica must be SQLite files")
+        sys.exit(1)
+
+    while True:
+        elapsed = sync(primary_path, replica_path)
+        print(f"🔁 Copied {primary_path} to {replica_path} in {elapsed * 1000:.0f} ms")
+        if not args.every:
+            break
+        time.sleep(args.every)
@@ -0,0 +1,104 @@
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app reads its database URL at import, so point it at a scratch file
+# before any test imports it
+DB_DIR = tempfile.mkdtemp(prefix='notebook_tests_')
+DB_PATH = os.path.join(DB_DIR, 'notebooks.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['MARKET_DATA_DB'] = os.path.join(DB_DIR, 'market_data.db')
+
+
+def make_notebook(title='Token analysis', cells=3):
+    """A small nbformat 4 notebook as bytes."""
+    return json.dumps({
+        'nbformat': 4,
+        'nbformat_minor': 5,
+        'metadata': {'title': title, 'description': 'Stablecoin peg study'},
+        'cells': [
+            {'cell_type': 'markdown', 'metadata': {}, 'source': [f'# Section {i}\n', 'Some *analysis*']}
+            if i % 2 == 0 else
+            {'cell_type': 'code', 'metadata': {}, 'execution_count': i, 'source': f'print({i})',
+             'outputs': [{'output_type': 'stream', 'name': 'stdout', 'text': f'{i}\n'}]}
+            for i in range(cells)
+        ],
+    }).encode()
+
+
+def notebook_with_image(image):
+    """``make_notebook`` plus a cell with a PNG output of ``image``."""
+    notebook = json.loads(make_notebook())
+    notebook['cells'].append({
+        'cell_type': 'code', 'metadata': {}, 'execution_count': 9, 'source': 'plot()',
+        'outputs': [{'output_type': 'display_data', 'metadata': {},
+                     'data': {'image/png': base64.b64encode(image).decode()}}],
+    })
+    return json.dumps(notebook).encode()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The Flask app on an empty database, with uploads under ``tmp_path``."""
+    monkeypatch.chdir(tmp_path)
+    from app import app, db, render_cache, response_cache, user_cache
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(DB_PATH + suffix):
+                os.remove(DB_PATH + suffix)
+        db.create_all()
+    render_cache.clear()
+    response_cache.clear()
+    user_cache.clear()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    def login(username='alice'):
+        client.post('/register', data={'username': username, 'email': f'{username}@example.com', 'password': 'pw'})
+        client.post('/login', data={'username': username, 'password': 'pw'})
+        return client
+    return login
+
+
+@pytest.fixture
+def upload(client):
+    def upload(content=None, filename='analysis.ipynb', tags='', is_public=True):
+        data = {'notebook': (io.BytesIO(content or make_notebook()), filename), 'tags': tags}
+        if is_public:
+            data['is_public'] = 'on'
+        return client.post('/upload', data=data, content_type='multipart/form-data')
+    return upload
+
+
+@pytest.fixture
+def run_jobs(app):
+    """Run every due background job in this process."""
+    from app import db, job_queue
+
+    def run_jobs():
+        with app.app_context():
+            count = job_queue.work('test', burst=True)
+            db.session.remove()
+        return count
+    return run_jobs
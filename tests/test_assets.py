@@ -0,0 +1,74 @@
+import base64
+import hashlib
+import os
+import threading
+
+import pytest
+
+from conftest import notebook_with_image
+from notebook_assets import AssetStore
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\0' * 64
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AssetStore(str(tmp_path / 'assets'))
+
+
+def test_put_is_content_addressed(store):
+    digest = store.put(PNG, 'png')
+    assert digest == hashlib.sha256(PNG).hexdigest()
+    assert store.put(PNG, 'png') == digest
+    assert store.lookup(digest, 'png') == store.path_for(digest, 'png')
+    assert os.listdir(os.path.dirname(store.path_for(digest, 'png'))) == [f'{digest}.png']
+
+
+@pytest.mark.parametrize('digest, extension', [('0' * 64, 'png'), ('../../etc/passwd', 'png'), ('a' * 64, 'exe')])
+def test_lookup_rejects_unknown_names(store, digest, extension):
+    assert store.lookup(digest, extension) is None
+
+
+def test_concurrent_first_puts_of_the_same_image(store):
+    for trial in range(20):
+        data = PNG + bytes([trial])
+        errors = []
+        start = threading.Barrier(8)
+
+        def put():
+            start.wait()
+            try:
+                store.put(data, 'png')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=put) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        path = store.path_for(hashlib.sha256(data).hexdigest(), 'png')
+        with open(path, 'rb') as fp:
+            assert fp.read() == data
+    leftovers = [name for _, _, names in os.walk(store.root) for name in names if name.endswith('.part')]
+    assert leftovers == []
+
+
+def test_assets_route_serves_extracted_images(client, login, upload, run_jobs):
+    login()
+    upload(notebook_with_image(PNG))
+    run_jobs()
+    digest = hashlib.sha256(PNG).hexdigest()
+    page = client.get('/notebook/1').get_data(as_text=True)
+    assert f'/assets/{digest}.png' in page
+    assert base64.b64encode(PNG).decode() not in page
+
+    response = client.get(f'/assets/{digest}.png')
+    assert response.status_code == 200
+    assert response.data == PNG
+    assert response.mimetype == 'image/png'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert client.get(f'/assets/{digest}.png', headers={'If-None-Match': f'"{digest}"'}).status_code == 304
+    assert client.get(f'/assets/{"0" * 64}.png').status_code == 404
+    assert client.get(f'/assets/{digest}.gif').status_code == 404
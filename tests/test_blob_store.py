@@ -0,0 +1,60 @@
+import io
+import os
+import time
+
+import pytest
+
+from blob_store import BlobStore
+from notebook_stream import cell_index_path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / 'blobs'))
+
+
+def age(path, seconds=7200):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_identical_uploads_are_stored_once(store):
+    first = store.save(io.BytesIO(b'{"cells": []}'))
+    second = store.save(io.BytesIO(b'{"cells": []}'))
+    other = store.save(io.BytesIO(b'{"cells": [{}]}'))
+    assert first[:2] == second[:2]
+    assert (first[2], second[2], other[2]) == (False, True, False)
+    assert sorted(store.iter_blobs()) == sorted([first[0], other[0]])
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_saving_a_duplicate_refreshes_its_mtime(store):
+    path, _, _ = store.save(io.BytesIO(b'same'))
+    age(path)
+    store.save(io.BytesIO(b'same'))
+    assert os.path.getmtime(path) > time.time() - 60
+
+
+def test_garbage_collection(store):
+    kept, _, _ = store.save(io.BytesIO(b'referenced'))
+    orphan, _, _ = store.save(io.BytesIO(b'orphan'))
+    recent, _, _ = store.save(io.BytesIO(b'just uploaded'))
+    with open(cell_index_path(orphan), 'wb') as out:
+        out.write(b'\0' * 16)
+    leftover = os.path.join(store.tmp_dir, 'dead.part')
+    with open(leftover, 'wb') as out:
+        out.write(b'half')
+    for path in (kept, orphan, leftover):
+        age(path)
+
+    removed, freed = store.collect_garbage([kept], dry_run=True)
+    assert sorted(removed) == sorted([orphan, leftover])
+    assert freed == len(b'orphan') + 16 + len(b'half')
+    assert os.path.exists(orphan)
+
+    removed, _ = store.collect_garbage([kept])
+    assert sorted(removed) == sorted([orphan, leftover])
+    assert not os.path.exists(orphan)
+    assert not os.path.exists(cell_index_path(orphan))
+    assert not os.path.exists(leftover)
+    assert sorted(store.iter_blobs()) == sorted([kept, recent])
@@ -0,0 +1,86 @@
+import os
+import threading
+
+import pytest
+
+from conftest import make_notebook
+from notebook_stream import cell_index_path, scan_notebook, write_cell_index
+
+
+@pytest.fixture
+def notebook(app, login, upload, run_jobs):
+    from app import db, Notebook
+    login()
+    upload(make_notebook(cells=10))
+    run_jobs()
+    with app.app_context():
+        return db.session.get(Notebook, 1).file_path
+
+
+def cells(client, **params):
+    response = client.get('/api/notebooks/1/cells', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_cell_window(client, notebook):
+    page = cells(client, start=2, count=3)
+    assert (page['start'], page['total']) == (2, 10)
+    assert [cell['index'] for cell in page['cells']] == [2, 3, 4]
+    assert [cell['cell_type'] for cell in page['cells']] == ['markdown', 'code', 'markdown']
+    assert 'Section 2' in page['cells'][0]['html']
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'start': -5, 'count': 2}, [0, 1]),
+    ({'start': 8, 'count': 5}, [8, 9]),
+    ({'start': 10}, []),
+    ({'start': 3, 'count': 0}, [3]),
+    ({'start': 0, 'count': 1000}, [0, 1, 2, 3]),
+])
+def test_start_and_count_are_clamped(app, client, notebook, monkeypatch, params, expected):
+    monkeypatch.setitem(app.config, 'MAX_CELL_WINDOW', 4)
+    page = cells(client, **params)
+    assert page['start'] == max(params['start'], 0)
+    assert [cell['index'] for cell in page['cells']] == expected
+
+
+def test_missing_index_is_rebuilt(client, notebook):
+    os.remove(cell_index_path(notebook))
+    page = cells(client, start=9, count=1)
+    assert page['total'] == 10
+    assert [cell['index'] for cell in page['cells']] == [9]
+    assert os.path.exists(cell_index_path(notebook))
+
+
+def test_private_notebooks_are_hidden(app, client, login, upload):
+    login()
+    upload(is_public=False)
+    client.get('/logout')
+    assert client.get('/api/notebooks/1/cells').status_code == 404
+    assert client.get('/api/notebooks/99/cells').status_code == 404
+
+
+def test_concurrent_index_writes(tmp_path):
+    path = str(tmp_path / 'nb.ipynb')
+    with open(path, 'wb') as out:
+        out.write(make_notebook(cells=50))
+    spans = scan_notebook(path)['cells']
+    errors = []
+    for _ in range(20):
+        start = threading.Barrier(8)
+
+        def write():
+            start.wait()
+            try:
+                write_cell_index(path, spans)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert errors == []
+    assert sorted(os.listdir(tmp_path)) == ['nb.ipynb', 'nb.ipynb.cells']
@@ -0,0 +1,27 @@
+import statistics
+import subprocess
+import sys
+
+from conftest import ROOT
+from bench_vercel import cold_start
+from profile_startup import COLD_START_TARGET_MS
+
+# The full app (app.py) is a long-running server and keeps SQLAlchemy and
+# Flask-Login at import because its models are declared there; the
+# serverless entry point must not pull them in
+HEAVY_MODULES = ('sqlalchemy', 'flask_sqlalchemy', 'flask_login', 'nbformat', 'pygments', 'numpy')
+
+
+def test_vercel_app_does_not_import_heavy_modules():
+    loaded = subprocess.run(
+        [sys.executable, '-c', f'import sys, vercel_app; print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])'],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout.split()
+    assert loaded == []
+
+
+def test_vercel_cold_start_is_within_target(monkeypatch):
+    # Each run imports vercel_app in a fresh interpreter from the working directory
+    monkeypatch.chdir(ROOT)
+    p50 = statistics.median(cold_start('', 7)) * 1000
+    assert p50 < COLD_START_TARGET_MS
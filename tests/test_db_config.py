@@ -0,0 +1,108 @@
+import pytest
+from flask import Flask, jsonify, request
+from flask_sqlalchemy import SQLAlchemy
+
+from db_config import PRIMARY_UNTIL_KEY, RoutingSession, init_database, replica_reads
+
+
+@pytest.fixture
+def routed(tmp_path):
+    """A small app with a primary and a replica SQLite file holding different rows."""
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='test', TESTING=True, REPLICA_STICKY_SECONDS=60,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/primary.db',
+        DATABASE_REPLICA_URI=f'sqlite:///{tmp_path}/replica.db',
+    )
+    init_database(app)
+    db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+    class Item(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(50))
+
+    @app.route('/items')
+    @replica_reads
+    def items():
+        return jsonify([item.name for item in Item.query.order_by(Item.id)])
+
+    @app.route('/items/primary')
+    def primary_items():
+        return jsonify([item.name for item in Item.query.order_by(Item.id)])
+
+    @app.route('/items', methods=['POST'])
+    @replica_reads
+    def add_item():
+        db.session.add(Item(name=request.form['name']))
+        db.session.commit()
+        return jsonify([item.name for item in Item.query.order_by(Item.id)])
+
+    with app.app_context():
+        for engine, name in ((db.engines[None], 'on primary'), (db.engines['replica'], 'on replica')):
+            db.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(Item.__table__.insert(), {'name': name})
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_replica_reads_go_to_the_replica(routed):
+    client = routed.test_client()
+    assert client.get('/items').get_json() == ['on replica']
+    assert client.get('/items/primary').get_json() == ['on primary']
+
+
+def test_writes_go_to_the_primary_and_are_read_back(routed):
+    client = routed.test_client()
+    # Flushed and read back in the same request, both on the primary
+    assert client.post('/items', data={'name': 'new'}).get_json() == ['on primary', 'new']
+    assert client.get('/items/primary').get_json() == ['on primary', 'new']
+
+
+def test_writer_reads_from_the_primary_for_a_while(routed):
+    client = routed.test_client()
+    client.post('/items', data={'name': 'new'})
+    assert client.get('/items').get_json() == ['on primary', 'new']
+    # Other clients still read the replica
+    assert routed.test_client().get('/items').get_json() == ['on replica']
+
+    with client.session_transaction() as session:
+        session[PRIMARY_UNTIL_KEY] = 0
+    assert client.get('/items').get_json() == ['on replica']
+
+
+def test_reads_stay_on_the_primary_without_a_replica(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/only.db', DATABASE_REPLICA_URI=None)
+    init_database(app)
+    db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+    @app.route('/')
+    @replica_reads
+    def index():
+        return str(db.session.execute(db.text('SELECT 1')).scalar())
+
+    with app.test_client() as client:
+        assert client.get('/').data == b'1'
+        assert PRIMARY_UNTIL_KEY not in client.get('/').headers.get('Set-Cookie', '')
+
+
+def test_sqlite_connections_are_tuned(app):
+    from app import db
+    with app.app_context():
+        with db.engine.connect() as connection:
+            def pragma(name):
+                return connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('busy_timeout') == 5000
+            assert pragma('mmap_size') == 256 * 1024 * 1024
+        # Every pooled connection, not only the first one
+        connections = [db.engine.raw_connection() for _ in range(3)]
+        try:
+            assert [c.execute('PRAGMA busy_timeout').fetchone()[0] for c in connections] == [5000] * 3
+        finally:
+            for c in connections:
+                c.close()
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from downsample import for_width, lttb, min_max
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = np.arange(5000, dtype=float)
+    y = np.cumsum(rng.normal(size=5000))
+    y[1234] = 1000  # a spike
+    y[4321] = -1000  # and a dip
+    return x, y
+
+
+def assert_valid_selection(indices, n, limit):
+    assert indices[0] == 0
+    assert indices[-1] == n - 1
+    assert np.all(np.diff(indices) > 0)
+    assert len(indices) <= limit
+
+
+@pytest.mark.parametrize('threshold', [3, 10, 100, 999])
+def test_lttb_keeps_threshold_points(series, threshold):
+    x, y = series
+    indices = lttb(x, y, threshold)
+    assert len(indices) == threshold
+    assert_valid_selection(indices, len(x), threshold)
+
+
+def test_lttb_keeps_sharp_extremes(series):
+    x, y = series
+    assert {1234, 4321} <= set(lttb(x, y, 200).tolist())
+
+
+@pytest.mark.parametrize('threshold', [0, 2, 5000, 6000])
+def test_lttb_returns_everything_when_it_cannot_reduce(series, threshold):
+    x, y = series
+    assert np.array_equal(lttb(x, y, threshold), np.arange(len(x)))
+
+
+@pytest.mark.parametrize('buckets', [1, 7, 100, 2499])
+def test_min_max_keeps_each_bucket_extremes(series, buckets):
+    _, y = series
+    indices = min_max(y, buckets)
+    assert_valid_selection(indices, len(y), 2 * buckets + 2)
+    kept = set(indices.tolist())
+    bucket_of = np.arange(len(y)) * buckets // len(y)
+    for bucket in range(buckets):
+        members = np.flatnonzero(bucket_of == bucket)
+        assert members[y[members].argmin()] in kept
+        assert members[y[members].argmax()] in kept
+
+
+def test_min_max_returns_everything_when_it_cannot_reduce():
+    y = np.arange(10.0)
+    assert np.array_equal(min_max(y, 5), np.arange(10))
+    assert np.array_equal(min_max(y, 0), np.arange(10))
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_for_width_fits_the_chart(series, method):
+    x, y = series
+    indices = for_width(x, y, 400, method)
+    assert_valid_selection(indices, len(x), 402)
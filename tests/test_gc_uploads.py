@@ -0,0 +1,91 @@
+import base64
+import json
+import os
+import time
+
+import pytest
+
+from conftest import notebook_with_image
+
+
+def age_uploads(seconds=7200):
+    then = time.time() - seconds
+    for directory, _, names in os.walk('uploads'):
+        for name in names:
+            os.utime(os.path.join(directory, name), (then, then))
+
+
+def stored_files(store):
+    return sorted(
+        os.path.join(directory, name) for directory, _, names in os.walk(store.root) for name in names
+    )
+
+
+@pytest.fixture
+def uploads(app, login, upload, run_jobs):
+    from app import db, Notebook
+    login()
+    upload(notebook_with_image(b'kept image'), filename='kept.ipynb')
+    upload(notebook_with_image(b'orphaned image'), filename='deleted.ipynb')
+    run_jobs()
+    with app.app_context():
+        paths = [nb.file_path for nb in Notebook.query.order_by(Notebook.id)]
+        db.session.delete(db.session.get(Notebook, 2))
+        db.session.commit()
+    age_uploads()
+    return paths
+
+
+def run_gc(app):
+    import gc_uploads
+    with app.app_context():
+        gc_uploads.main()
+
+
+def test_unreferenced_blobs_and_assets_are_removed(app, uploads, capsys):
+    from app import asset_store, blob_store
+    kept, deleted = uploads
+    assert len(stored_files(asset_store)) == 2
+    run_gc(app)
+    assert list(blob_store.iter_blobs()) == [kept]
+    assert not os.path.exists(deleted)
+    assert len(stored_files(asset_store)) == 1
+    assert '1 orphaned assets' in capsys.readouterr().out
+
+
+def test_unreadable_notebook_keeps_every_asset(app, uploads, capsys):
+    from app import asset_store, blob_store
+    kept, _ = uploads
+    with open(kept, 'wb') as out:
+        out.write(b'{"cells": [{"truncated')
+    assets = stored_files(asset_store)
+    run_gc(app)
+    assert list(blob_store.iter_blobs()) == [kept]
+    assert stored_files(asset_store) == assets
+    output = capsys.readouterr().out
+    assert f'Could not read {kept}' in output
+    assert 'Skipped asset and output collection' in output
+
+
+def notebook_v3(image):
+    return json.dumps({
+        'nbformat': 3, 'nbformat_minor': 0, 'metadata': {'name': 'Old notebook'},
+        'worksheets': [{'metadata': {}, 'cells': [
+            {'cell_type': 'code', 'language': 'python', 'input': 'plot()', 'metadata': {}, 'prompt_number': 1,
+             'outputs': [{'output_type': 'display_data', 'metadata': {}, 'png': base64.b64encode(image).decode()}]},
+        ]}],
+    }).encode()
+
+
+def test_nbformat_3_notebooks_keep_their_assets(app, client, login, upload, run_jobs):
+    from app import asset_store
+    login()
+    upload(notebook_v3(b'old image'), filename='old.ipynb')
+    run_jobs()
+    # The viewer stores the images of old notebooks as it renders them
+    assert client.get('/notebook/1').status_code == 200
+    assets = stored_files(asset_store)
+    assert len(assets) == 1
+    age_uploads()
+    run_gc(app)
+    assert stored_files(asset_store) == assets
@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+@pytest.fixture
+def queue(app):
+    from app import db, Job
+    queue = JobQueue(db, Job, lease_seconds=60, max_attempts=2, retry_delay=0)
+    queue.calls = []
+    queue.failures = []
+
+    @queue.task('ok')
+    def ok(value):
+        queue.calls.append(value)
+
+    def record_failure(value):
+        queue.failures.append(value)
+
+    @queue.task('broken', on_failure=record_failure)
+    def broken(value):
+        queue.calls.append(value)
+        raise RuntimeError('boom')
+
+    with app.app_context():
+        yield queue
+
+
+def enqueue(queue, name, **payload):
+    job = queue.enqueue(name, **payload)
+    queue.db.session.commit()
+    return job.id
+
+
+def job(queue, job_id):
+    queue.db.session.remove()
+    return queue.db.session.get(queue.model, job_id)
+
+
+def test_job_runs_once(queue):
+    job_id = enqueue(queue, 'ok', value=1)
+    assert queue.work('test', burst=True) == 1
+    assert queue.calls == [1]
+    assert job(queue, job_id).status == DONE
+    assert queue.run_next('test') is False
+
+
+def test_claim_leases_each_job_to_one_worker(queue):
+    job_id = enqueue(queue, 'ok', value=1)
+    claimed = queue.claim('a')
+    assert (claimed.id, claimed.status, claimed.locked_by, claimed.attempts) == (job_id, RUNNING, 'a', 1)
+    assert queue.claim('b') is None
+
+
+def test_failed_job_is_retried_then_failed(queue):
+    job_id = enqueue(queue, 'broken', value=7)
+    assert queue.run_next('test')
+    retried = job(queue, job_id)
+    assert (retried.status, retried.attempts) == (QUEUED, 1)
+    assert 'boom' in retried.last_error
+    assert queue.failures == []
+
+    assert queue.run_next('test')
+    failed = job(queue, job_id)
+    assert (failed.status, failed.attempts) == (FAILED, 2)
+    assert queue.calls == [7, 7]
+    assert queue.failures == [7]
+    assert queue.run_next('test') is False
+
+
+def test_failing_on_failure_still_fails_the_job(queue):
+    def explode(value):
+        raise ValueError('handler broke too')
+    queue.handlers['broken'] = (queue.handlers['broken'][0], explode)
+    job_id = enqueue(queue, 'broken', value=1)
+    queue.work('test', burst=True)
+    failed = job(queue, job_id)
+    assert failed.status == FAILED
+    assert 'handler broke too' in failed.last_error
+
+
+def expire_lease(queue, job_id):
+    queue.db.session.get(queue.model, job_id).locked_at = datetime.utcnow() - timedelta(seconds=61)
+    queue.db.session.commit()
+
+
+def test_expired_lease_is_claimed_again(queue):
+    job_id = enqueue(queue, 'ok', value=1)
+    queue.claim('dead')
+    assert queue.claim('b') is None
+    expire_lease(queue, job_id)
+    claimed = queue.claim('b')
+    assert (claimed.id, claimed.locked_by, claimed.attempts) == (job_id, 'b', 2)
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(queue):
+    job_id = enqueue(queue, 'broken', value=3)
+    for worker in ('dead', 'dead again'):
+        queue.claim(worker)
+        expire_lease(queue, job_id)
+    assert queue.run_next('b') is False
+    failed = job(queue, job_id)
+    assert (failed.status, failed.attempts) == (FAILED, 2)
+    assert 'Lease expired' in failed.last_error
+    assert queue.calls == []
+    assert queue.failures == [3]
+
+
+def test_upload_that_keeps_failing_is_marked_failed(app, login, upload, run_jobs, monkeypatch):
+    from app import db, Notebook, job_queue
+    monkeypatch.setitem(job_queue.handlers, 'process_notebook', (
+        lambda notebook_id: 1 / 0, job_queue.handlers['process_notebook'][1]
+    ))
+    monkeypatch.setattr(job_queue, 'retry_delay', 0)
+    login()
+    upload()
+    run_jobs()
+    with app.app_context():
+        assert db.session.get(Notebook, 1).status == 'failed'
@@ -0,0 +1,152 @@
+import gzip
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+from ingest_market_data import ingest
+from market_data import HOUR, MarketDataStore, read_rows
+
+
+def rows(symbol, start, hours, price=1.0):
+    return [(symbol, start + i * HOUR, price, 1000.0 * price, 10.0) for i in range(hours)]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'market.db')
+
+
+def test_results_are_memoized(path):
+    store = MarketDataStore(path, fixtures_dir=None)
+    store.ingest([rows('DAI', 0, 48)])
+    assert store.series('1d') is store.series('1d')
+
+
+def test_rows_ingested_elsewhere_are_served(path):
+    web = MarketDataStore(path, fixtures_dir=None)
+    web.ingest([rows('DAI', 0, 48)])
+    before = web.series('1d')
+    assert sorted(before['tokens']) == ['DAI']
+
+    # e.g. ingest_market_data.py, in another process
+    MarketDataStore(path, fixtures_dir=None).ingest([rows('USDC', 0, 48, price=2.0)])
+    after = web.series('1d')
+    assert sorted(after['tokens']) == ['DAI', 'USDC']
+    assert web.metrics('1d')['total_market_cap']['value'] == 3000
+
+
+CSV = '''symbol,timestamp,price,market_cap,volume
+dai,2025-01-01T00:00:00Z,1.0,100,5
+DAI,3600,1.001,101,6
+DAI,7200,1.002
+,10800,0.999,99,4
+DAI,3600,1.5,150,7
+DAI,14400,-1,100,5
+USDC,not a time,1,1,1
+'''
+
+
+def test_read_rows_passes_short_rows_on_empty(tmp_path):
+    path = tmp_path / 'prices.csv'
+    path.write_text(CSV)
+    rows = list(read_rows(str(path)))
+    assert rows[0] == ('dai', '2025-01-01T00:00:00Z', '1.0', '100', '5')
+    assert rows[2] == ('PRICES', None, None, None, None)
+    assert rows[3][0] == 'PRICES'
+    assert len(rows) == 7
+
+
+def test_read_rows_formats(tmp_path):
+    records = [{'timestamp': 0, 'price': 1, 'market_cap': 2, 'volume': 3}, {'symbol': 'eth', 'timestamp': 1}]
+    (tmp_path / 'btc.jsonl').write_text(''.join(json.dumps(record) + '\n' for record in records))
+    with gzip.open(tmp_path / 'btc.json.gz', 'wt') as fp:
+        json.dump(records, fp)
+    for name in ('btc.jsonl', 'btc.json.gz'):
+        assert list(read_rows(str(tmp_path / name))) == [('BTC', 0, 1, 2, 3), ('eth', 1, None, None, None)]
+    (tmp_path / 'btc.txt').write_text('')
+    with pytest.raises(ValueError):
+        list(read_rows(str(tmp_path / 'btc.txt')))
+
+
+def test_ingest_counts_rejected_and_duplicate_rows(tmp_path, path):
+    (tmp_path / 'prices.csv').write_text(CSV)
+    store = MarketDataStore(path, fixtures_dir=None)
+    assert store.data_version() == 0
+    stats, _ = ingest(store, [str(tmp_path / 'prices.csv')], batch_size=2)
+    # The short row, the negative price and the bad timestamp are rejected;
+    # the second DAI@3600 lands in another batch and replaces the first
+    assert (stats['valid'], stats['rejected'], stats['written']) == (4, 3, 4)
+    assert store.data_version() == 1
+    with store.connect() as conn:
+        assert conn.execute('SELECT price FROM token_prices WHERE symbol = ? AND ts = 3600', ('DAI',)).fetchone() == (1.5,)
+        assert conn.execute('SELECT COUNT(*) FROM token_prices').fetchone() == (3,)
+
+    stats, _ = ingest(store, [str(tmp_path / 'prices.csv')])
+    assert stats['duplicates'] == 1  # within one batch this time
+    assert store.data_version() == 2
+
+
+def test_ingest_script_reports_bad_rows(tmp_path, path):
+    (tmp_path / 'prices.csv').write_text(CSV)
+    result = subprocess.run(
+        [sys.executable, 'ingest_market_data.py', str(tmp_path / 'prices.csv'), '--db', path],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert '7 read, 3 rejected' in result.stdout
+
+    (tmp_path / 'bad.csv').write_text('timestamp,price\n1,2\n')
+    result = subprocess.run(
+        [sys.executable, 'ingest_market_data.py', str(tmp_path / 'bad.csv'), '--db', path],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert 'missing column(s) market_cap, volume' in result.stdout
+
+
+@pytest.fixture(scope='module')
+def vercel_client():
+    from vercel_app import app
+    return app.test_client()
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+@pytest.mark.parametrize('width', [50, 300])
+def test_market_points_fit_the_chart_width(vercel_client, method, width):
+    response = vercel_client.get('/api/market', query_string={'window': '90d', 'width': width, 'method': method})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data['width'], data['method'], data['field']) == (width, method, 'market_cap')
+    assert data['tokens']
+    for series in data['tokens'].values():
+        assert 2 <= len(series['t']) <= width + 2
+        assert len(series['market_cap']) == len(series['t'])
+        assert series['t'] == sorted(series['t'])
+        assert data['start'] < series['t'][0] and series['t'][-1] <= data['end']
+
+
+def test_market_points_are_fewer_than_the_raw_rows(vercel_client):
+    full = vercel_client.get('/api/market?window=90d&width=4000').get_json()
+    narrow = vercel_client.get('/api/market?window=90d&width=100').get_json()
+    for symbol, series in narrow['tokens'].items():
+        assert len(series['t']) < len(full['tokens'][symbol]['t'])
+        assert series['t'][0] == full['tokens'][symbol]['t'][0]
+        assert series['t'][-1] == full['tokens'][symbol]['t'][-1]
+
+
+@pytest.mark.parametrize('query', [
+    'window=2y&width=100', 'window=7d&width=100&field=supply', 'window=7d&width=100&method=average',
+])
+def test_market_points_reject_bad_queries(vercel_client, query):
+    response = vercel_client.get(f'/api/market?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_market_metrics(vercel_client):
+    metrics = vercel_client.get('/api/market/metrics?window=7d').get_json()
+    assert metrics['total_market_cap']['value'] > 0
+    assert vercel_client.get('/api/market/metrics?window=2y').status_code == 400
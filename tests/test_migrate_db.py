@@ -0,0 +1,88 @@
+import pytest
+
+
+@pytest.fixture
+def migrate_db(app):
+    import migrate_db
+    with app.app_context():
+        yield migrate_db
+
+
+def query_plan(migrate_db, name):
+    """SQLite's plan for the first statement the hot query ``name`` issues."""
+    from sqlalchemy import event
+    db = migrate_db.db
+    run = dict(migrate_db.hot_queries())[name]
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    statement, parameters = captured[0]
+    with db.engine.connect() as connection:
+        return ' / '.join(row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters))
+
+
+def test_latest_update_reads_one_index_entry(migrate_db):
+    assert 'USING COVERING INDEX ix_notebook_updated_at' in query_plan(migrate_db, 'latest update')
+
+
+def test_apply_indexes_adds_missing_indexes(migrate_db):
+    with migrate_db.db.engine.begin() as connection:
+        connection.exec_driver_sql('DROP INDEX ix_notebook_updated_at')
+    assert migrate_db.apply_indexes() == ['ix_notebook_updated_at']
+    assert migrate_db.apply_indexes() == []
+
+
+def test_tag_search_looks_the_tag_up_once(migrate_db):
+    plan = query_plan(migrate_db, 'search by tag')
+    assert plan.startswith('SEARCH tag USING COVERING INDEX')
+    assert 'CORRELATED' not in plan
+
+
+def test_tag_search_uses_the_tag_index_with_statistics(migrate_db):
+    with migrate_db.db.engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO user (id, username, email, password_hash) VALUES (1, 'u', 'u@x', 'x')")
+        connection.exec_driver_sql(
+            'INSERT INTO tag (id, name, notebook_count) VALUES (?, ?, 0)', [(i, f'tag{i}') for i in range(20)]
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO notebook (id, title, filename, file_path, is_public, user_id, created_at) "
+            "VALUES (?, 'n', 'n.ipynb', 'n', 1, 1, '2025-01-01 00:00:00')", [(i,) for i in range(1, 2001)]
+        )
+        connection.exec_driver_sql('INSERT INTO notebook_tags VALUES (?, ?)', [(i, i % 20) for i in range(1, 2001)])
+        connection.exec_driver_sql("UPDATE tag SET name = 'python' WHERE id = 3")
+        connection.exec_driver_sql('ANALYZE')
+    assert 'SEARCH notebook_tags USING COVERING INDEX ix_notebook_tags_tag_id (tag_id=?)' in query_plan(
+        migrate_db, 'search by tag'
+    )
+
+
+def test_migration_indexes_existing_notebooks_for_search(app, client, login, upload, run_jobs):
+    from sqlalchemy import text
+    from app import db, response_cache
+    login()
+    upload(tags='dai')
+    run_jobs()
+    # A database from before the full-text index: the table is created empty
+    with app.app_context():
+        db.session.execute(text('DROP TABLE notebook_fts'))
+        db.session.commit()
+        db.create_all()
+
+    def found(query):
+        response_cache.clear()
+        return b'Showing 1 result<' in client.get('/search', query_string={'q': query}).data
+
+    assert not found('section')
+    import migrate_db
+    with app.app_context():
+        assert migrate_db.rebuild_search_index() == 1
+        assert migrate_db.rebuild_search_index() == 0
+    assert found('section')  # cell text
+    assert found('stablecoin')  # description
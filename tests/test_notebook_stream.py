@@ -0,0 +1,88 @@
+import hashlib
+import io
+import json
+
+import pytest
+
+from notebook_stream import (
+    NotebookFormatError, ensure_cell_index, iter_cells, read_cell_range, save_stream, scan_notebook
+)
+
+# Strings full of what a naive scanner would trip over
+TRICKY = ['{"not": [a, cell]}', 'quote \\" and \\\\ backslash', '\\\\', 'brackets ]}{[', 'ünïcödé ✓ 🚀', '']
+
+
+def notebook(indent=None):
+    cells = [
+        {'cell_type': 'markdown', 'metadata': {'tags': ['x']}, 'source': [text, '\n']}
+        for text in TRICKY
+    ] + [
+        {'cell_type': 'code', 'metadata': {}, 'execution_count': None, 'source': 'x = {"a": [1, 2.5e-3, true, null]}',
+         'outputs': [{'output_type': 'execute_result', 'data': {'text/plain': ['[]', '{}']}, 'metadata': {}}]},
+        {'cell_type': 'raw', 'metadata': {}, 'source': []},
+    ]
+    return {
+        'metadata': {'title': 'Scan ] test {', 'kernelspec': {'name': 'python3'}, 'list': [1, [2, {'3': None}]]},
+        'cells': cells,
+        'extra': {'skipped': ['values', {'nested': True}, -1.5, False]},
+        'nbformat': 4,
+        'nbformat_minor': 5,
+    }
+
+
+@pytest.fixture(params=[None, 1], ids=['compact', 'indented'])
+def path(request, tmp_path):
+    path = tmp_path / 'scan.ipynb'
+    path.write_text(json.dumps(notebook(), indent=request.param, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64 * 1024])
+def test_scan_matches_json_load(path, chunk_size):
+    with open(path, 'rb') as fp:
+        expected = json.load(fp)
+    raw_cells = []
+    result = scan_notebook(path, on_cell=lambda index, raw: raw_cells.append((index, raw)), chunk_size=chunk_size)
+    assert result['metadata'] == expected['metadata']
+    assert result['nbformat'] == expected['nbformat']
+    assert [json.loads(raw) for _, raw in raw_cells] == expected['cells']
+    assert [index for index, _ in raw_cells] == list(range(len(expected['cells'])))
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    assert [json.loads(data[start:end]) for start, end in result['cells']] == expected['cells']
+    assert [json.loads(raw) for raw in iter_cells(path, chunk_size=chunk_size)] == expected['cells']
+
+
+def test_metadata_only_stops_early(tmp_path):
+    path = tmp_path / 'meta_first.ipynb'
+    # Everything after the metadata is broken, so reaching it would raise
+    path.write_bytes(b'{"metadata": {"title": "t"}, "nbformat": 4, "cells": [{"broken"')
+    assert scan_notebook(str(path), metadata_only=True)['metadata'] == {'title': 't'}
+    with pytest.raises(NotebookFormatError):
+        scan_notebook(str(path))
+
+
+def test_cell_index_reads_any_range(path):
+    with open(path, 'rb') as fp:
+        expected = json.load(fp)['cells']
+    assert ensure_cell_index(path) == len(expected)
+    assert read_cell_range(path, 2, 3) == expected[2:5]
+    assert read_cell_range(path, len(expected) - 1, 10) == expected[-1:]
+
+
+def test_nbformat_3_has_no_cells_list(tmp_path):
+    path = tmp_path / 'v3.ipynb'
+    path.write_text(json.dumps({'metadata': {}, 'nbformat': 3, 'worksheets': [{'cells': [{}]}]}))
+    result = scan_notebook(str(path))
+    assert (result['nbformat'], result['cells']) == (3, [])
+    with pytest.raises(NotebookFormatError):
+        list(iter_cells(str(path)))
+    with pytest.raises(NotebookFormatError):
+        ensure_cell_index(str(path))
+
+
+def test_save_stream_hashes_while_copying(tmp_path):
+    data = bytes(range(256)) * 1000
+    digest, size = save_stream(io.BytesIO(data), str(tmp_path / 'copy'), chunk_size=1000)
+    assert (digest, size) == (hashlib.sha256(data).hexdigest(), len(data))
+    assert (tmp_path / 'copy').read_bytes() == data
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def notebooks(login, upload):
+    login()
+    for i in range(7):
+        upload(filename=f'nb{i}.ipynb')
+    return 7
+
+
+def fetch(client, cursor=None, limit=3):
+    response = client.get('/api/notebooks', query_string={'limit': limit, **({'cursor': cursor} if cursor else {})})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_cursor_round_trip():
+    from app import Notebook
+    values = [datetime(2025, 9, 30, 12, 30, 15, 123456), 42]
+    token = encode_cursor(values, 'prev')
+    assert decode_cursor(token, [Notebook.created_at, Notebook.id]) == (values, 'prev')
+
+
+@pytest.mark.parametrize('token', ['not-base64!', 'e30', encode_cursor([1], 'next'), encode_cursor([1, 2], 'up')])
+def test_invalid_cursor_is_rejected(token):
+    from app import Notebook
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, [Notebook.created_at, Notebook.id])
+
+
+def test_pages_forward_without_gaps_or_repeats(client, notebooks):
+    seen = []
+    page = fetch(client)
+    assert page['prev_cursor'] is None
+    while True:
+        seen.extend(nb['id'] for nb in page['notebooks'])
+        if not page['next_cursor']:
+            break
+        page = fetch(client, page['next_cursor'])
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == notebooks
+
+
+def test_prev_cursor_returns_the_previous_page(client, notebooks):
+    first = fetch(client)
+    second = fetch(client, first['next_cursor'])
+    back = fetch(client, second['prev_cursor'])
+    assert [nb['id'] for nb in back['notebooks']] == [nb['id'] for nb in first['notebooks']]
+
+
+def test_bad_cursor_is_a_client_error(client, notebooks):
+    assert client.get('/api/notebooks?cursor=garbage').status_code == 400
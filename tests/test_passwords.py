@@ -0,0 +1,72 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from passwords import PasswordHasher, method_prefix
+
+
+@pytest.mark.parametrize('method', ['scrypt', 'scrypt:16384:8:1', 'pbkdf2', 'pbkdf2:sha512', 'pbkdf2:sha256:1000'])
+def test_method_prefix_matches_werkzeug(method):
+    assert method_prefix(method) == generate_password_hash('pw', method).split('$', 1)[0]
+
+
+def test_needs_rehash_does_not_hash(monkeypatch):
+    hasher = PasswordHasher('pbkdf2:sha256:1000')
+    monkeypatch.setattr(hasher, '_run', lambda *args: pytest.fail('needs_rehash ran the KDF'))
+    assert not hasher.needs_rehash(generate_password_hash('pw', 'pbkdf2:sha256:1000'))
+    assert hasher.needs_rehash(generate_password_hash('pw', 'pbkdf2:sha256:2000'))
+    assert hasher.needs_rehash(generate_password_hash('pw', 'scrypt:16384:8:1'))
+
+
+def test_hash_verifies():
+    hasher = PasswordHasher('pbkdf2:sha256:1000')
+    pwhash = hasher.hash('secret')
+    assert hasher.verify(pwhash, 'secret')
+    assert not hasher.verify(pwhash, 'wrong')
+    assert not hasher.needs_rehash(pwhash)
+
+
+@pytest.fixture
+def old_user(app):
+    from app import db, User
+    with app.app_context():
+        db.session.add(User(
+            username='old', email='old@example.com', password_hash=generate_password_hash('pw', 'pbkdf2:sha256:1000')
+        ))
+        db.session.commit()
+
+
+def stored_hash(app):
+    from app import db, User
+    with app.app_context():
+        return db.session.query(User.password_hash).filter_by(username='old').scalar()
+
+
+def busy(*args):
+    from passwords import HasherBusy
+    raise HasherBusy('Too many password checks in progress')
+
+
+def test_login_upgrades_old_hashes(app, client, old_user):
+    response = client.post('/login', data={'username': 'old', 'password': 'pw'})
+    assert response.status_code == 302
+    assert stored_hash(app).startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+
+
+def test_busy_rehash_does_not_fail_the_login(app, client, old_user, monkeypatch):
+    from app import password_hasher
+    monkeypatch.setattr(password_hasher, 'hash', busy)
+    response = client.post('/login', data={'username': 'old', 'password': 'pw'})
+    assert response.status_code == 302
+    assert stored_hash(app).startswith('pbkdf2:sha256:1000$')
+
+
+def test_busy_verification_is_refused(client, old_user, monkeypatch):
+    from app import password_hasher
+    monkeypatch.setattr(password_hasher, 'verify', busy)
+    assert client.post('/login', data={'username': 'old', 'password': 'pw'}).status_code == 503
+
+
+def test_wrong_password(client, old_user):
+    response = client.post('/login', data={'username': 'old', 'password': 'nope'})
+    assert response.status_code == 200
+    assert b'Invalid username or password' in response.data
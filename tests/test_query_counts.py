@@ -0,0 +1,39 @@
+import pytest
+
+from query_stats import track_queries
+
+# Statements per page, whatever the number of notebooks listed: the page
+# query, selectin-loaded tags and the Last-Modified lookup of the response
+# cache. Authors are joined into the page query.
+EXPECTED = {
+    '/api/notebooks': 3,
+    '/search?q=analysis': 3,
+    '/search?tag=dai': 3,
+}
+
+
+def count_queries(app, path):
+    from app import response_cache
+    response_cache.clear()
+    client = app.test_client()
+    with track_queries() as stats:
+        response = client.get(path)
+    assert response.status_code == 200
+    return stats.count
+
+
+@pytest.mark.parametrize('path', sorted(EXPECTED))
+def test_list_pages_issue_a_constant_number_of_statements(app, login, upload, run_jobs, path):
+    client = login()
+    upload(tags='dai')
+    run_jobs()
+    assert count_queries(app, path) == EXPECTED[path]
+
+    # More notebooks by more authors must not add per-row queries
+    for username in ('bob', 'carol'):
+        client.get('/logout')
+        login(username)
+        for i in range(3):
+            upload(filename=f'{username}{i}.ipynb', tags='dai, extra')
+    run_jobs()
+    assert count_queries(app, path) == EXPECTED[path]
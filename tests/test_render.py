@@ -0,0 +1,125 @@
+import html
+import json
+import re
+
+from conftest import make_notebook
+from notebook_render import _FRAME_STYLE, OutputLimits, render_cell, render_markdown
+
+
+def html_cell(html):
+    return {
+        'cell_type': 'code', 'source': 'display(html)', 'execution_count': 1,
+        'outputs': [{'output_type': 'display_data', 'data': {'text/html': html}}],
+    }
+
+
+def test_markdown_keeps_the_supported_subset():
+    assert render_markdown('**bold** *it* `x < y`\nnext') == (
+        '<strong>bold</strong> <em>it</em> <code>x &lt; y</code><br>next'
+    )
+
+
+def test_markdown_source_is_escaped():
+    rendered = render_markdown('<script>alert(1)</script> <!-- *note*')
+    assert '<script>' not in rendered
+    assert '<!--' not in rendered
+    assert '&lt;script&gt;' in rendered
+    assert '<em>note</em>' in rendered
+
+
+def test_html_output_is_sandboxed():
+    rendered = render_cell(html_cell('<table><tr><td>1</td><script>alert(1)</script><div class="x"'), 0)
+    assert 'sandbox="allow-same-origin"' in rendered
+    assert '<script>' not in rendered
+    assert '<table>' not in rendered
+    assert '&lt;table&gt;' in rendered
+    # Unbalanced markup stays inside the frame's attribute
+    assert rendered.count('<div') == rendered.count('</div>')
+
+
+def stream_cell(text):
+    return {
+        'cell_type': 'code', 'source': 'print(text)', 'execution_count': 1,
+        'outputs': [{'output_type': 'stream', 'name': 'stdout', 'text': text}],
+    }
+
+
+def small_limits(saved):
+    def save_full(text, extension):
+        saved.append((text, extension))
+        return f'/outputs/{len(saved)}.{extension}'
+    return OutputLimits(100, 5, save_full)
+
+
+def test_long_text_output_shows_its_beginning():
+    saved = []
+    text = ''.join(f'line {i}\n' for i in range(50))
+    rendered = render_cell(stream_cell(text), 0, small_limits(saved))
+    assert saved == [(text, 'txt')]
+    assert 'line 4' in rendered
+    assert 'line 5' not in rendered
+    assert 'data-url="/outputs/1.txt" data-kind="text"' in rendered
+    assert 'data-frame-style' not in rendered
+
+
+def test_large_html_output_is_loaded_into_the_same_frame():
+    saved = []
+    markup = '<table>' + '<tr><td>1</td></tr>' * 20 + '</table>'
+    rendered = render_cell(html_cell(markup), 0, small_limits(saved))
+    assert saved == [(markup, 'html')]
+    assert '&lt;table&gt;' not in rendered
+    assert 'html-output-frame' not in rendered
+    assert 'data-kind="html"' in rendered
+    # The viewer builds the frame from this style, as _sandboxed does inline
+    frame_style = re.search(r'data-frame-style="([^"]*)"', rendered).group(1)
+    assert html.unescape(frame_style) == _FRAME_STYLE
+
+
+def test_small_outputs_are_not_truncated():
+    saved = []
+    rendered = render_cell(stream_cell('ok\n'), 0, small_limits(saved))
+    rendered += render_cell(html_cell('<b>ok</b>'), 1, small_limits(saved))
+    assert saved == []
+    assert 'load-full-output' not in rendered
+
+
+def test_full_outputs_are_served_as_plain_text(app, client, login, upload, run_jobs, monkeypatch):
+    monkeypatch.setitem(app.config, 'OUTPUT_MAX_BYTES', 100)
+    text = 'x' * 500 + '\n'
+    notebook = json.loads(make_notebook())
+    notebook['cells'].append(dict(stream_cell(text), metadata={}))
+    login()
+    upload(json.dumps(notebook).encode())
+    run_jobs()
+    page = client.get('/notebook/1').get_data(as_text=True)
+    url = html.unescape(re.search(r'data-url="([^"]*)" data-kind="text"', page).group(1))
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == text
+    assert response.mimetype == 'text/plain'
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_unknown_full_output_is_not_found(client):
+    assert client.get(f'/outputs/{"0" * 64}.txt').status_code == 404
+    assert client.get('/outputs/not-a-digest.html').status_code == 404
+
+
+def test_viewer_page_does_not_leak_uploaded_markup(client, login, upload, run_jobs):
+    notebook = {
+        'nbformat': 4, 'nbformat_minor': 5, 'metadata': {'title': 'Markup'},
+        'cells': [
+            {'cell_type': 'markdown', 'metadata': {}, 'source': '<img src=x onerror=alert(1)> <div'},
+            html_cell('<!-- never closed'),
+            {'cell_type': 'markdown', 'metadata': {}, 'source': 'Last cell'},
+        ],
+    }
+    login()
+    upload(json.dumps(notebook).encode())
+    run_jobs()
+    page = client.get('/notebook/1').get_data(as_text=True)
+    assert '<img src=x' not in page
+    assert '<!-- never closed' not in page
+    assert 'Last cell' in page
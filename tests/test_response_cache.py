@@ -0,0 +1,37 @@
+def upload_and_show(client, upload):
+    upload()
+    # Show the flashed message: pages with pending messages skip the cache
+    client.get('/dashboard')
+
+
+def titles(client):
+    response = client.get('/api/notebooks')
+    assert response.status_code == 200
+    return [nb['title'] for nb in response.get_json()['notebooks']]
+
+
+def test_repeat_request_is_served_from_the_cache(client, login, upload, run_jobs):
+    from app import response_cache
+    login()
+    upload_and_show(client, upload)
+    run_jobs()
+    first = client.get('/api/notebooks')
+    hits = response_cache.hits
+    second = client.get('/api/notebooks', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert response_cache.hits == hits + 1
+
+
+def test_worker_updates_are_not_hidden_by_the_cache(app, client, login, upload, run_jobs):
+    from app import db, Notebook
+    login()
+    upload_and_show(client, upload)
+    placeholder = titles(client)
+    # The worker runs in another process, so nothing clears this process's cache
+    run_jobs()
+    assert titles(client) == ['Token analysis'] != placeholder
+
+    with app.app_context():
+        db.session.get(Notebook, 1).title = 'Renamed elsewhere'
+        db.session.commit()
+    assert titles(client) == ['Renamed elsewhere']
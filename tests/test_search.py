@@ -0,0 +1,38 @@
+import pytest
+
+
+@pytest.fixture
+def indexed(login, upload, run_jobs):
+    login()
+    upload(tags='dai, python')
+    run_jobs()
+
+
+def test_search_finds_cell_text(client, indexed):
+    response = client.get('/search?q=analysis')
+    assert response.status_code == 200
+    assert b'Showing 1 result<' in response.data
+
+
+@pytest.mark.parametrize('query', ['!!!', '***', ' - '])
+def test_search_without_word_characters_matches_nothing(client, indexed, query):
+    response = client.get('/search', query_string={'q': query})
+    assert response.status_code == 200
+    assert b'No notebooks found' in response.data
+
+
+def test_search_by_tag(client, indexed):
+    response = client.get('/search?tag=DAI')
+    assert response.status_code == 200
+    assert b'Showing 1 result<' in response.data
+
+
+def test_result_count_describes_the_page(app, client, login, upload, run_jobs, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGE_SIZE', 2)
+    login()
+    for i in range(3):
+        upload(filename=f'nb{i}.ipynb', tags='dai')
+    run_jobs()
+    first = client.get('/search?tag=dai').get_data(as_text=True)
+    assert 'Showing 2 results, more on the next page' in first
+    assert 'notebooks found' not in first
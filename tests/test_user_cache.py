@@ -0,0 +1,87 @@
+import user_cache as user_cache_module
+from query_stats import track_queries
+from user_cache import UserCache
+
+
+class User:
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+        self.email = f'{username}@example.com'
+        self.created_at = None
+
+
+def test_cached_users_are_loaded_once():
+    cache = UserCache(ttl=60, max_entries=10)
+    loads = []
+
+    def load(user_id):
+        loads.append(user_id)
+        return User(user_id, 'alice')
+
+    assert cache.get(1, load).username == 'alice'
+    assert cache.get(1, load).get_id() == '1'
+    assert loads == [1]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    cache = UserCache(ttl=60, max_entries=10)
+    now = [1000.0]
+    monkeypatch.setattr(user_cache_module.time, 'monotonic', lambda: now[0])
+    cache.get(1, lambda user_id: User(user_id, 'alice'))
+    now[0] += 59
+    assert cache.get(1, lambda user_id: User(user_id, 'renamed')).username == 'alice'
+    now[0] += 2
+    assert cache.get(1, lambda user_id: User(user_id, 'renamed')).username == 'renamed'
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = UserCache(ttl=60, max_entries=2)
+    for user_id in (1, 2, 1, 3):
+        cache.get(user_id, lambda user_id: User(user_id, f'user{user_id}'))
+    assert cache.stats()['entries'] == 2
+    assert cache.get(2, lambda user_id: None) is None
+    assert cache.get(1, lambda user_id: None).username == 'user1'
+
+
+def test_missing_users_are_not_cached():
+    cache = UserCache(ttl=60, max_entries=10)
+    assert cache.get(1, lambda user_id: None) is None
+    assert cache.get(1, lambda user_id: User(user_id, 'alice')).username == 'alice'
+
+
+def user_queries(client, path='/dashboard'):
+    with track_queries() as stats:
+        response = client.get(path)
+    assert response.status_code == 200
+    return response, [statement for statement in stats.statements if 'FROM user ' in statement]
+
+
+def test_logged_in_requests_skip_the_user_query(login):
+    client = login()
+    user_queries(client)
+    response, queries = user_queries(client)
+    assert queries == []
+    assert b'Welcome back, alice!' in response.data
+
+
+def test_user_changes_are_picked_up(app, login):
+    from app import db, User as UserModel
+    client = login()
+    user_queries(client)
+    with app.app_context():
+        db.session.query(UserModel).filter_by(username='alice').one().username = 'alicia'
+        db.session.commit()
+    response, queries = user_queries(client)
+    assert len(queries) == 1
+    assert b'Welcome back, alicia!' in response.data
+
+
+def test_logout_drops_the_entry(login):
+    from app import user_cache
+    client = login()
+    user_queries(client)
+    assert user_cache.stats()['entries'] == 1
+    client.get('/logout')
+    assert user_cache.stats()['entries'] == 0
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from view_counter import ViewCounter
+
+
+@pytest.fixture
+def counter(app, login, upload):
+    from app import db
+    login()
+    upload()
+    counter = ViewCounter(app, db, interval=60, threshold=1000)
+    yield counter
+    counter._stopped.set()
+    counter._wake.set()
+
+
+def views(app, notebook_id=1):
+    from app import db, Notebook
+    with app.app_context():
+        return db.session.get(Notebook, notebook_id).views
+
+
+def test_views_are_flushed_in_one_batch(app, counter):
+    for _ in range(3):
+        counter.increment(1)
+    assert counter.pending(1) == 3
+    assert views(app) == 0
+    assert counter.flush() == 1
+    assert counter.pending(1) == 0
+    assert views(app) == 3
+
+
+def fail_execute(*args, **kwargs):
+    raise OperationalError('UPDATE notebook', {}, Exception('database is locked'))
+
+
+def test_failed_flush_keeps_the_counts(app, counter, monkeypatch):
+    from app import db
+    counter.increment(1, 2)
+    monkeypatch.setattr(db.session, 'execute', fail_execute)
+    with pytest.raises(OperationalError):
+        counter.flush()
+    assert counter.pending(1) == 2
+    monkeypatch.undo()
+    counter.flush()
+    assert views(app) == 2
+
+
+def test_shutdown_flush_logs_instead_of_raising(app, counter, monkeypatch, caplog):
+    from app import db
+    counter.increment(1)
+    monkeypatch.setattr(db.session, 'execute', fail_execute)
+    counter.stop()
+    assert 'Failed to flush notebook view counts on shutdown' in caplog.text
+    assert counter.pending(1) == 1
@@ -0,0 +1,96 @@
+"""
+Per-process TTL cache of logged-in user identities
+
+Flask-Login loads the current user on every authenticated request. The
+loader serves a small ``CachedUser`` from this cache instead of querying the
+``user`` table each time. Entries expire after ``ttl`` seconds and are dropped
+as soon as the user row changes in this process or the user logs out; other
+processes see a change once their entry expires.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+
+class CachedUser:
+    """Identity of a logged-in user, detached from the database session."""
+
+    __slots__ = ('id', 'username', 'email', 'created_at', 'expires_at')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, user, expires_at):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.created_at = user.created_at
+        self.expires_at = expires_at
+
+    def get_id(self):
+        return str(self.id)
+
+
+class UserCache:
+    """TTL + LRU cache of ``CachedUser`` keyed by user id."""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, load):
+        """Return the cached user, or ``load(user_id)`` it; ``None`` if there is no such user."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry
+            self._entries.pop(user_id, None)
+            self.misses += 1
+        user = load(user_id)
+        if user is None:
+            return None
+        entry = CachedUser(user, now + self.ttl)
+        with self._lock:
+            self._entries[user_id] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def watch(self, model):
+        """Invalidate a user's entry whenever its ``model`` row is updated or deleted."""
+        def invalidate(mapper, connection, target):
+            self.invalidate(target.id)
+
+        event.listen(model, 'after_update', invalidate)
+        event.listen(model, 'after_delete', invalidate)
@@ -4,12 +4,19 @@ Vercel-compatible Flask application for Group C Token Analysis Dashboard
 This version serves the full dashboard HTML for Vercel deployment
 """
 
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, request, jsonify
+from functools import lru_cache
+import hashlib
 import os
+from market_data import DEFAULT_PATH, MarketDataStore, InvalidQuery
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
 
+# Token market data, loaded from the CSV fixtures on first use. Vercel only
+# allows writes under the temp directory.
+market_store = MarketDataStore(DEFAULT_PATH)
+
 # Mock data for the dashboard
 MOCK_NOTEBOOKS = [
     {
@@ -359,6 +366,10 @@ DASHBOARD_HTML = '''
             position: relative;
         }
         
+        .chart-card.wide {
+            grid-column: 1 / -1;
+        }
+        
         .analysis-section {
             margin-bottom: 32px;
         }
@@ -575,8 +586,8 @@ DASHBOARD_HTML = '''
                                 <h3>Total Token Market Cap</h3>
                                 <i class="fas fa-chart-line"></i>
                             </div>
-                            <div class="metric-value">$3.1T</div>
-                            <div class="metric-change positive">
+                            <div class="metric-value" id="marketCapValue">$3.1T</div>
+                            <div class="metric-change positive" id="marketCapChange">
                                 <i class="fas fa-arrow-up"></i>
                                 +5.2%
                             </div>
@@ -599,8 +610,8 @@ DASHBOARD_HTML = '''
                                 <h3>Daily Token Trading Volume</h3>
                                 <i class="fas fa-exchange-alt"></i>
                             </div>
-                            <div class="metric-value">$125.6B</div>
-                            <div class="metric-change negative">
+                            <div class="metric-value" id="volumeValue">$125.6B</div>
+                            <div class="metric-change negative" id="volumeChange">
                                 <i class="fas fa-arrow-down"></i>
                                 -2.1%
                             </div>
@@ -658,6 +669,17 @@ DASHBOARD_HTML = '''
                                 <canvas id="stablecoinChart" width="300" height="200"></canvas>
                             </div>
                         </div>
+                        
+                        <!-- Market Cap History -->
+                        <div class="chart-card wide">
+                            <div class="chart-header">
+                                <h3>Market Cap History</h3>
+                                <i class="fas fa-chart-area"></i>
+                            </div>
+                            <div class="chart-container">
+                                <canvas id="historyChart" width="800" height="200"></canvas>
+                            </div>
+                        </div>
                     </div>
                 </div>
                 
@@ -713,33 +735,96 @@ DASHBOARD_HTML = '''
     </div>
     
     <script>
+        // Token order and colours shared by the market data charts
+        const TOKENS = ['USDT', 'USDC', 'USDP', 'DAI', 'FRAX', 'LINK', 'DOGE', 'BNB'];
+        const TOKEN_COLORS = [
+            '#26A69A',  // USDT - Teal
+            '#2196F3',  // USDC - Blue
+            '#FF9800',  // USDP - Orange
+            '#4CAF50',  // DAI - Green
+            '#9C27B0',  // FRAX - Purple
+            '#FF5722',  // LINK - Deep Orange
+            '#FFC107',  // DOGE - Amber
+            '#607D8B'   // BNB - Blue Grey
+        ];
+        const charts = {};
+        let marketData = null;
+        let distributionMetric = 'market_cap';
+        
         // Initialize Dashboard Charts
         document.addEventListener('DOMContentLoaded', function() {
             createMarketCapChart();
             createAdoptionChart();
             createStablecoinChart();
+            createHistoryChart();
             initializeChartButtons();
+            
+            const timeFilter = document.getElementById('timeFilter');
+            timeFilter.addEventListener('change', () => loadMarketData(timeFilter.value));
+            loadMarketData(timeFilter.value);
         });
         
+        // Fetch the bucketed token series for a time window and redraw the charts
+        function loadMarketData(timeWindow) {
+            // One point per pixel of the history chart is all it can show
+            const width = Math.round(document.getElementById('historyChart').clientWidth) || 800;
+            fetch(`/api/market?window=${timeWindow}&width=${width}&field=market_cap`)
+                .then(response => response.json())
+                .then(data => {
+                    marketData = data;
+                    updateMarketCapChart();
+                    updateStablecoinChart();
+                    updateHistoryChart();
+                })
+                .catch(error => console.error('Error loading market data:', error));
+            
+            fetch(`/api/market/metrics?window=${timeWindow}`)
+                .then(response => response.json())
+                .then(metrics => {
+                    updateMetricCard('marketCap', metrics.total_market_cap);
+                    updateMetricCard('volume', metrics.daily_volume);
+                })
+                .catch(error => console.error('Error loading market metrics:', error));
+        }
+        
+        // Value and change over the selected window, from the precomputed rollups
+        function updateMetricCard(id, metric) {
+            if (!metric) {
+                return;
+            }
+            document.getElementById(`${id}Value`).textContent = formatUsd(metric.value);
+            const change = document.getElementById(`${id}Change`);
+            if (metric.change_pct === null) {
+                change.textContent = '';
+                return;
+            }
+            const rising = metric.change_pct >= 0;
+            change.className = `metric-change ${rising ? 'positive' : 'negative'}`;
+            change.innerHTML = `<i class="fas fa-arrow-${rising ? 'up' : 'down'}"></i> ${rising ? '+' : ''}${metric.change_pct.toFixed(1)}%`;
+        }
+        
+        function latestValue(symbol, field) {
+            const series = marketData && marketData.tokens[symbol];
+            return series && series.latest ? series.latest[field] : null;
+        }
+        
+        function formatUsd(value) {
+            if (value >= 1e12) return `$${(value / 1e12).toFixed(2)}T`;
+            if (value >= 1e9) return `$${(value / 1e9).toFixed(1)}B`;
+            if (value >= 1e6) return `$${(value / 1e6).toFixed(1)}M`;
+            return `$${Math.round(value).toLocaleString()}`;
+        }
+        
         function createMarketCapChart() {
             const ctx = document.getElementById('marketCapChart').getContext('2d');
             
-            new Chart(ctx, {
+            charts.marketCap = new Chart(ctx, {
                 type: 'doughnut',
                 data: {
-                    labels: ['USDT', 'USDC', 'USDP', 'DAI', 'FRAX', 'LINK', 'DOGE', 'BNB'],
+                    labels: TOKENS,
                     datasets: [{
-                        data: [35, 20, 8, 12, 6, 8, 5, 6],
-                        backgroundColor: [
-                            '#26A69A',  // USDT - Teal
-                            '#2196F3',  // USDC - Blue
-                            '#FF9800',  // USDP - Orange
-                            '#4CAF50',  // DAI - Green
-                            '#9C27B0',  // FRAX - Purple
-                            '#FF5722',  // LINK - Deep Orange
-                            '#FFC107',  // DOGE - Amber
-                            '#607D8B'   // BNB - Blue Grey
-                        ],
+                        data: [],
+                        backgroundColor: TOKEN_COLORS,
                         borderWidth: 0
                     }]
                 },
@@ -753,12 +838,23 @@ DASHBOARD_HTML = '''
                                 padding: 20,
                                 usePointStyle: true
                             }
+                        },
+                        tooltip: {
+                            callbacks: {
+                                label: context => `${context.label}: ${formatUsd(context.parsed)}`
+                            }
                         }
                     }
                 }
             });
         }
         
+        // Latest market cap, or traded volume over the selected window
+        function updateMarketCapChart() {
+            charts.marketCap.data.datasets[0].data = TOKENS.map(symbol => latestValue(symbol, distributionMetric));
+            charts.marketCap.update();
+        }
+        
         function createAdoptionChart() {
             const ctx = document.getElementById('adoptionChart').getContext('2d');
             
@@ -803,23 +899,14 @@ DASHBOARD_HTML = '''
         function createStablecoinChart() {
             const ctx = document.getElementById('stablecoinChart').getContext('2d');
             
-            new Chart(ctx, {
+            charts.stablecoin = new Chart(ctx, {
                 type: 'bar',
                 data: {
-                    labels: ['USDT', 'USDC', 'USDP', 'DAI', 'FRAX', 'LINK', 'DOGE', 'BNB'],
+                    labels: TOKENS,
                     datasets: [{
                         label: 'Market Cap ($B)',
-                        data: [95.2, 52.8, 8.4, 12.6, 6.2, 15.8, 18.5, 25.3],
-                        backgroundColor: [
-                            '#26A69A',  // USDT - Teal
-                            '#2196F3',  // USDC - Blue
-                            '#FF9800',  // USDP - Orange
-                            '#4CAF50',  // DAI - Green
-                            '#9C27B0',  // FRAX - Purple
-                            '#FF5722',  // LINK - Deep Orange
-                            '#FFC107',  // DOGE - Amber
-                            '#607D8B'   // BNB - Blue Grey
-                        ],
+                        data: [],
+                        backgroundColor: TOKEN_COLORS,
                         borderRadius: 8
                     }]
                 },
@@ -848,6 +935,83 @@ DASHBOARD_HTML = '''
             });
         }
         
+        function updateStablecoinChart() {
+            charts.stablecoin.data.datasets[0].data = TOKENS.map(symbol => {
+                const marketCap = latestValue(symbol, 'market_cap');
+                return marketCap === null ? null : Math.round(marketCap / 1e8) / 10;
+            });
+            charts.stablecoin.update();
+        }
+        
+        function createHistoryChart() {
+            const ctx = document.getElementById('historyChart').getContext('2d');
+            
+            charts.history = new Chart(ctx, {
+                type: 'line',
+                data: {
+                    datasets: TOKENS.map((symbol, i) => ({
+                        label: symbol,
+                        data: [],
+                        borderColor: TOKEN_COLORS[i],
+                        backgroundColor: TOKEN_COLORS[i],
+                        borderWidth: 2,
+                        pointRadius: 0,
+                        tension: 0.2
+                    }))
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    parsing: false,
+                    interaction: {
+                        mode: 'index',
+                        intersect: false
+                    },
+                    plugins: {
+                        legend: {
+                            position: 'bottom',
+                            labels: {
+                                usePointStyle: true
+                            }
+                        },
+                        tooltip: {
+                            callbacks: {
+                                title: items => new Date(items[0].parsed.x).toLocaleString(),
+                                label: context => `${context.dataset.label}: ${formatUsd(context.parsed.y)}`
+                            }
+                        }
+                    },
+                    scales: {
+                        x: {
+                            type: 'linear',
+                            grid: {
+                                display: false
+                            },
+                            ticks: {
+                                maxTicksLimit: 8,
+                                callback: value => new Date(value).toLocaleDateString(undefined, { month: 'short', day: 'numeric' })
+                            }
+                        },
+                        y: {
+                            // Market caps range from millions to hundreds of billions
+                            type: 'logarithmic',
+                            ticks: {
+                                callback: value => formatUsd(value)
+                            }
+                        }
+                    }
+                }
+            });
+        }
+        
+        function updateHistoryChart() {
+            charts.history.data.datasets.forEach(dataset => {
+                const series = marketData.tokens[dataset.label];
+                dataset.data = series ? series.t.map((t, i) => ({ x: t * 1000, y: series.market_cap[i] })) : [];
+            });
+            charts.history.update();
+        }
+        
         function initializeChartButtons() {
             const chartBtns = document.querySelectorAll('.chart-btn');
             chartBtns.forEach(btn => {
@@ -857,8 +1021,10 @@ DASHBOARD_HTML = '''
                     // Add active class to clicked button
                     this.classList.add('active');
                     
-                    // TODO: Implement chart switching logic
-                    console.log('Switching to:', this.getAttribute('data-chart'));
+                    distributionMetric = this.getAttribute('data-chart') === 'volume' ? 'volume' : 'market_cap';
+                    if (marketData) {
+                        updateMarketCapChart();
+                    }
                 });
             });
         }
@@ -874,9 +1040,46 @@ DASHBOARD_HTML = '''
 </html>
 '''
 
+# Compiled once per process instead of on every request
+DASHBOARD_TEMPLATE = app.jinja_env.from_string(DASHBOARD_HTML)
+
+@lru_cache(maxsize=1)
+def dashboard_page():
+    # MOCK_NOTEBOOKS never changes, so the page is rendered once and reused
+    html = DASHBOARD_TEMPLATE.render(notebooks=MOCK_NOTEBOOKS)
+    return html, hashlib.sha1(html.encode()).hexdigest()
+
 @app.route('/')
 def index():
-    return render_template_string(DASHBOARD_HTML, notebooks=MOCK_NOTEBOOKS)
+    html, etag = dashboard_page()
+    response = app.response_class(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/market')
+def market_series():
+    window = request.args.get('window', '7d')
+    width = request.args.get('width', type=int)
+    try:
+        if width is None:
+            return jsonify(market_store.series(window))
+        # Downsampled to about one point per pixel of the chart
+        return jsonify(market_store.points(
+            window, width,
+            field=request.args.get('field', 'market_cap'),
+            method=request.args.get('method', 'lttb')
+        ))
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/market/metrics')
+def market_metrics():
+    try:
+        return jsonify(market_store.metrics(request.args.get('window', '7d')))
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/api/health')
 def health_check():
@@ -0,0 +1,97 @@
+"""
+Write-behind view counter for notebooks
+
+Views are accumulated in memory and flushed to the database in batched
+``UPDATE ... SET views = views + ?`` statements, so page views no longer take
+the SQLite write lock on every request.
+"""
+
+import atexit
+import threading
+from collections import Counter
+
+from sqlalchemy import text
+
+
+class ViewCounter:
+    """Per-process, thread-safe buffer of pending notebook view increments.
+
+    A background thread flushes the buffer every ``interval`` seconds, or as
+    soon as ``threshold`` views are pending. Remaining counts are flushed when
+    the process exits.
+    """
+
+    UPDATE_SQL = text('UPDATE notebook SET views = views + :count WHERE id = :id')
+
+    def __init__(self, app, db, interval=5.0, threshold=100):
+        self.app = app
+        self.db = db
+        self.interval = interval
+        self.threshold = threshold
+        self._pending = Counter()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        atexit.register(self.stop)
+
+    def increment(self, notebook_id, count=1):
+        with self._lock:
+            self._pending[notebook_id] += count
+            self._total += count
+            if self._thread is None:
+                self._start()
+            if self._total >= self.threshold:
+                self._wake.set()
+
+    def pending(self, notebook_id):
+        with self._lock:
+            return self._pending.get(notebook_id, 0)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = Counter()
+                self._total = 0
+            params = [{'id': notebook_id, 'count': count} for notebook_id, count in batch.items()]
+            try:
+                with self.app.app_context():
+                    self.db.session.execute(self.UPDATE_SQL, params)
+                    self.db.session.commit()
+            except Exception:
+                # Put the counts back so the next flush retries them
+                with self._lock:
+                    self._pending.update(batch)
+                    self._total += sum(batch.values())
+                raise
+            return len(params)
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval)
+        try:
+            self.flush()
+        except Exception:
+            self.app.logger.exception('Failed to flush notebook view counts on shutdown')
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Failed to flush notebook view counts')
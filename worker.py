@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Run background jobs, such as processing uploaded notebooks, in a pool of
+worker processes
+
+    python worker.py                # 2 processes, until Ctrl+C
+    python worker.py --processes 4
+    python worker.py --burst        # exit once no job is due
+
+Run it from the same directory as the app: notebook and asset paths are
+relative to it. On Ctrl+C or SIGTERM each worker finishes its current job
+before exiting.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from app import app, db, job_queue
+
+
+def run_worker(burst, poll_interval):
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    name = f'{socket.gethostname()}:{os.getpid()}'
+    with app.app_context():
+        # Pooled connections inherited from the parent must not be shared
+        db.engine.dispose(close=False)
+        count = job_queue.work(name, stop=stop, poll_interval=poll_interval, burst=burst)
+    print(f"   worker {name} ran {count} jobs")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--processes', type=int, default=2, help='worker processes')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='seconds between checks of an empty queue')
+    parser.add_argument('--burst', action='store_true', help='exit once no job is due')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        print(f"⚙️  Starting {args.processes} workers, jobs: {job_queue.stats()}")
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(args.burst, args.poll_interval))
+        for _ in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        print("\n⏳ Finishing current jobs...")
+        for worker in workers:
+            worker.join()
+    print("👋 Workers stopped")